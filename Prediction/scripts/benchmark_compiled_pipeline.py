@@ -0,0 +1,49 @@
+"""Benchmark the compiled scoring plan against the pandas PredictionPipeline.
+
+Reports the parity difference, single-row latency and the cold-start cost of loading the
+joblib artifacts versus the memory-mapped export. Run from the Prediction directory:
+
+    PYTHONPATH=. python scripts/benchmark_compiled_pipeline.py
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+from src.logging import logging
+from src.pipeline.compiled_pipeline import COLUMN_RENAMES, CompiledPredictionPipeline
+from src.pipeline.prediction_pipeline import PredictionPipeline
+
+pipeline = PredictionPipeline('config.yaml')
+with open('src/test/mock_data.json', 'r') as file:
+    sample = pd.DataFrame(json.load(file)).rename(columns=COLUMN_RENAMES).dropna()
+records = sample.to_dict(orient='records')
+compiled = CompiledPredictionPipeline(pipeline.cat_preprocessor, pipeline.num_preprocessor, pipeline.model)
+
+logging.disable(logging.CRITICAL)
+difference = compiled.max_abs_difference(pipeline.transform_predict(sample), records)
+pandas_time = timeit.timeit(lambda: pipeline.transform_predict(sample.iloc[:1]), number=200) / 200
+compiled_time = timeit.timeit(lambda: compiled.predict_proba(records[:1]), number=20000) / 20000
+print(f"Max abs difference vs pandas path: {difference}")
+print(f"Single-row pandas path: {pandas_time * 1e6:.1f} us, compiled path: {compiled_time * 1e6:.1f} us")
+
+# Cold start of a fresh worker: unpickling the sklearn artifacts vs loading the memory-mapped export.
+export_dir = tempfile.mkdtemp()
+compiled.save(export_dir)
+loaded = CompiledPredictionPipeline.load(export_dir)
+print(f"Max abs difference of the loaded export: {np.max(np.abs(loaded.predict_proba(records) - compiled.predict_proba(records)))}")
+startup = {
+    'joblib artifacts': "from src.pipeline.prediction_pipeline import PredictionPipeline; PredictionPipeline('config.yaml')",
+    'compiled export': "from src.pipeline.compiled_pipeline import CompiledPredictionPipeline; "
+                       f"CompiledPredictionPipeline.load({export_dir!r})",
+}
+for name, code in startup.items():
+    # VmHWM rather than ru_maxrss, which Linux carries over from the forking parent across exec.
+    script = ("import time; start = time.perf_counter(); " + code + "; seconds = time.perf_counter() - start; "
+              "print(seconds, [line.split()[1] for line in open('/proc/self/status') if line.startswith('VmHWM')][0])")
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    seconds, max_rss_kb = output.strip().splitlines()[-1].split()
+    print(f"Startup with {name}: {float(seconds):.3f} s, peak RSS {int(max_rss_kb) / 1024:.1f} MB")
@@ -0,0 +1,32 @@
+"""Benchmark DataLoader's Parquet snapshot against reading the Excel source.
+
+Run from the Prediction directory; the snapshot at data_snapshot_path is rebuilt:
+
+    PYTHONPATH=. python scripts/benchmark_data_loader.py
+"""
+import os
+import time
+
+import pandas as pd
+from src.components.data_ingestion import DataLoader
+
+loader = DataLoader('config.yaml')
+loader.validate_file()
+
+
+def timed(read):
+    start = time.perf_counter()
+    data = read()
+    return time.perf_counter() - start, data.shape
+
+
+excel_time, excel_shape = timed(lambda: pd.read_excel(loader.file_path))
+if os.path.exists(loader.snapshot_path):
+    os.remove(loader.snapshot_path)
+convert_time, _ = timed(loader.read)
+full_time, full_shape = timed(lambda: pd.read_parquet(loader.snapshot_path))
+pruned_time, pruned_shape = timed(loader.read)
+print(f"pd.read_excel:                  {excel_time:.3f} s {excel_shape}")
+print(f"first read (convert + snapshot): {convert_time:.3f} s")
+print(f"Parquet snapshot, all columns:   {full_time:.3f} s {full_shape}")
+print(f"Parquet snapshot, cols_to_select: {pruned_time:.3f} s {pruned_shape}")
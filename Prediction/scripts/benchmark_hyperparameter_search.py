@@ -0,0 +1,73 @@
+"""Benchmark the hyperparameter search on the real training data.
+
+Run from the Prediction directory. By default the exhaustive GridSearchCV is compared with
+successive halving on growing grids (pass the numbers of C values to try), followed by the
+warm-started lbfgs regularization path. With the argument 'pipeline', CV on data preprocessed
+and resampled as a whole is compared with leakage-free pipeline CV:
+
+    PYTHONPATH=. python scripts/benchmark_hyperparameter_search.py [n_Cs ... | pipeline]
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV, ParameterGrid
+from src.components.hyperparamer_tuning import HyperparameterTuner, make_folds
+from src.pipeline.data_pipeline import DataLoadSplitPipeline
+from src.pipeline.training_pipeline import TrainEvaluatePipeline
+
+X_raw, _, y_raw, _ = DataLoadSplitPipeline('config.yaml', save_path='').fit_transform()
+train_pipeline = TrainEvaluatePipeline('config.yaml')
+X_train, y_train = train_pipeline.data_balance_pipeline.fit_resample(
+    train_pipeline.preprocessor.fit_transform(X_raw, y_raw), y_raw)
+
+if sys.argv[1:2] == ['pipeline']:
+    # Compare CV on data preprocessed and resampled as a whole with leakage-free CV,
+    # once with an empty fold cache and once with a filled one.
+    tuner = HyperparameterTuner('config.yaml')
+    start = time.perf_counter()
+    best_params = tuner.tune(X_train, y_train)
+    print(f"resampled CV:            {time.perf_counter() - start:6.2f} s, {best_params}, "
+          f"F1 {max(r['mean_score'] for r in tuner.cv_results_ if r['params'] == best_params):.4f}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        tuner.cache_dir = cache_dir
+        for cache in ('cold', 'warm'):
+            start = time.perf_counter()
+            best_params = tuner.tune_pipeline(X_raw, y_raw, train_pipeline.preprocessor,
+                                              train_pipeline.data_balance_pipeline)
+            print(f"pipeline CV, {cache} cache: {time.perf_counter() - start:6.2f} s, {best_params}, "
+                  f"F1 {max(r['mean_score'] for r in tuner.cv_results_ if r['params'] == best_params):.4f}")
+else:
+    # Compare the exhaustive GridSearchCV this class used to run with the successive-halving
+    # search on growing grids, using the resampled training data.
+    for n_Cs in [int(size) for size in sys.argv[1:]] or [5, 10, 20]:
+        param_grid = {'C': [float(C) for C in np.logspace(-2, 2, n_Cs)],
+                      'penalty': ['l1', 'l2'], 'solver': ['liblinear']}
+        start = time.perf_counter()
+        grid_search = GridSearchCV(LogisticRegression(random_state=42), param_grid, cv=5, scoring='f1', n_jobs=-1)
+        grid_search.fit(X_train, y_train)
+        grid_seconds = time.perf_counter() - start
+
+        tuner = HyperparameterTuner('config.yaml')
+        tuner.param_grid, tuner.method = param_grid, 'halving'
+        start = time.perf_counter()
+        best_params = tuner.tune(X_train, y_train)
+        halving_seconds = time.perf_counter() - start
+        halving_score = grid_search.cv_results_['mean_test_score'][grid_search.cv_results_['params'].index(best_params)]
+        print(f"{2 * n_Cs:>4} candidates: GridSearchCV {grid_seconds:7.2f} s (best F1 {grid_search.best_score_:.4f}), "
+              f"halving {halving_seconds:6.2f} s (F1 of its pick {halving_score:.4f}, "
+              f"{len(tuner.cv_results_) * tuner.cv} fits)")
+
+    # Warm-started regularization path for a solver that supports it.
+    tuner = HyperparameterTuner('config.yaml')
+    folds = make_folds(X_train, y_train, cv=tuner.cv)
+    candidates = list(ParameterGrid({'C': [float(C) for C in np.logspace(-2, 2, 20)],
+                                     'penalty': ['l2'], 'solver': ['lbfgs']}))
+    for warm_start in (False, True):
+        tuner.warm_start = warm_start
+        start = time.perf_counter()
+        results = tuner.evaluate(candidates, folds, len(folds[0][4]))
+        print(f"lbfgs l2 path of 20 C values, warm_start={warm_start}: {time.perf_counter() - start:6.2f} s, "
+              f"best F1 {max(r['mean_score'] for r in results):.4f}")
@@ -0,0 +1,44 @@
+"""Benchmark exact against scalable undersample_majority on the real majority class scaled up.
+
+Run from the Prediction directory, optionally passing the row counts to try:
+
+    PYTHONPATH=. python scripts/benchmark_undersample.py [rows ...]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from src.pipeline.data_pipeline import DataLoadSplitPipeline
+from src.pipeline.training_pipeline import TrainEvaluatePipeline
+from src.utilities.undersample import undersample_majority
+
+# Scale the real preprocessed majority class up by resampling rows with a little jitter.
+X_train, _, y_train, _ = DataLoadSplitPipeline('config.yaml', save_path='').fit_transform()
+X_train = TrainEvaluatePipeline('config.yaml').preprocessor.fit_transform(X_train, y_train)
+majority = X_train[(y_train == y_train.value_counts().idxmax()).to_numpy()].to_numpy()
+sizes = [int(size) for size in sys.argv[1:]] or [len(majority), 20000, 100000, 1000000]
+rng = np.random.default_rng(42)
+
+for size in sizes:
+    if size == len(majority):
+        X = pd.DataFrame(majority)
+    else:
+        X = pd.DataFrame(majority[rng.integers(0, len(majority), size)] +
+                         rng.normal(scale=0.05, size=(size, majority.shape[1])))
+    y = pd.Series(np.zeros(size, dtype=int))
+    kept = {}
+    for scalable in (False, True):
+        if not scalable and size > 100000:
+            continue
+        tracemalloc.start()
+        start = time.perf_counter()
+        kept[scalable] = undersample_majority(X, y, scalable=scalable, n_jobs=-1)[0].index
+        seconds = time.perf_counter() - start
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"{size:>8} rows {'scalable' if scalable else 'exact':>8}: {seconds:7.2f} s, "
+              f"peak traced memory {peak_mb:7.1f} MB, kept {len(kept[scalable])}")
+    if len(kept) == 2:
+        print(f"{size:>8} rows identical: {kept[False].equals(kept[True])}")
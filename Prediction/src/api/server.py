@@ -0,0 +1,103 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+import yaml
+from src.logging import logging
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Open the listening socket once in the parent so every worker accepts on it."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket):
+    """Serve the already imported app on the shared socket until told to stop."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None))
+    server.run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: int):
+    """
+    Pre-fork server: load the model once, then fork the worker processes.
+
+    The app, and with it the active model, is imported before forking, so workers share
+    those pages copy-on-write instead of each loading their own copy. Workers that die are
+    restarted until the parent receives SIGTERM or SIGINT, which it forwards to the workers.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind.
+        workers (int): Number of worker processes.
+    """
+    sock = bind_socket(host, port)
+    from src.api.service import app
+    # Move everything loaded so far out of the garbage collector's reach, so collections in the
+    # workers do not write to (and thereby copy) the shared pages.
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, sock)
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+        logging.info(f"Started prediction worker {pid}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    logging.info(f"Serving on {host}:{port} with {workers} workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logging.error(f"Prediction worker {pid} exited with status {status}; restarting")
+        if time.monotonic() - started < 1:
+            # Avoid a tight restart loop when workers die right after starting.
+            time.sleep(1)
+        spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    with open('config.yaml', 'r') as file:
+        server_config = yaml.safe_load(file).get('server', {})
+    parser = argparse.ArgumentParser(description="Run the prediction API with several worker processes.")
+    parser.add_argument('--host', default=server_config.get('host', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=server_config.get('port', 8003))
+    parser.add_argument('--workers', type=int,
+                        default=int(os.getenv('WEB_CONCURRENCY', server_config.get('workers', 2))))
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
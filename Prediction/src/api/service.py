@@ -1,19 +1,178 @@
-import pandas as pd
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, ValidationError
 from src.logging import logging
-from src.pipeline.prediction_pipeline import PredictionPipeline
+from src.pipeline.compiled_pipeline import CompiledPredictionPipeline, COLUMN_RENAMES
+from src.utilities.bounded_executor import BoundedExecutor, ExecutorSaturated
+from src.utilities.micro_batcher import MicroBatcher
+from src.utilities.model_registry import ModelRegistry
+from src.utilities.score_cache import ScoreCache
 
 app = FastAPI()
+CONFIG_PATH = 'config.yaml'
+
+with open(CONFIG_PATH, 'r') as file:
+    config = yaml.safe_load(file)
+registry_config = config.get('model_registry', {})
+registry = ModelRegistry(registry_config.get('path', 'models/registry'))
+
+
+def load_pipeline(version: str):
+    """
+    Load a registry bundle without touching the active pipeline.
+
+    The bundle's compiled export is preferred: it is memory-mapped and loads without importing
+    scikit-learn or pandas. Bundles without one fall back to PredictionPipeline and the joblib artifacts.
+    """
+    compiled_path = registry.compiled_path(version)
+    if config.get('compiled_inference', True) and compiled_path is not None:
+        return CompiledPredictionPipeline.load(compiled_path, version=version)
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+    return PredictionPipeline(CONFIG_PATH, registry.bundle_paths(version), version)
+
+
+def publish_configured_artifacts() -> Optional[str]:
+    """
+    Publish the artifacts named in the config and activate them if they are new.
+
+    Runs at every start, so a restart after retraining serves the retrained model even though the
+    registry lives on a persistent volume. Publishing dedups by content hash: unchanged artifacts map
+    to their existing bundle and the active version is left alone, so a rollback or an activation
+    made through the registry CLI survives restarts until the artifacts change again.
+
+    Returns:
+        Optional[str]: The configured artifacts' bundle version, or None if the artifacts are missing
+            and the registry already has an active version to serve.
+    """
+    artifact_paths = {
+        'categorical_preprocessor': config['categorical_preprocessor_path'],
+        'numerical_preprocessor': config['numerical_preprocessor_path'],
+        'model': config['model_path'],
+    }
+    missing = [path for path in artifact_paths.values() if not os.path.exists(path)]
+    if missing and registry.active_version() is not None:
+        logging.info(f"Configured artifacts not found ({', '.join(missing)}), serving the registry's active version")
+        return None
+    known = registry.versions()
+    version = registry.publish(artifact_paths, metadata={'source': CONFIG_PATH}, config_path=CONFIG_PATH)
+    if version not in known:
+        registry.activate(version)
+    return version
+
 
 try:
-    prediction_pipeline = PredictionPipeline('config.yaml')
-    logging.info("PredictionPipeline initialized successfully.")
+    publish_configured_artifacts()
+    prediction_pipeline = load_pipeline(registry.active_version())
+    logging.info(f"Prediction pipeline initialized successfully with model version {prediction_pipeline.version}.")
 except Exception as e:
-    logging.error(f"Failed to initialize PredictionPipeline: {e}")
+    logging.error(f"Failed to initialize prediction pipeline: {e}")
     prediction_pipeline = None
     raise
 
+cache_config = config.get('score_cache', {})
+score_cache = ScoreCache(max_size=cache_config.get('max_size', 10000),
+                         ttl_seconds=cache_config.get('ttl_seconds', 3600))
+scoring_config = config.get('scoring', {})
+scoring_executor = BoundedExecutor(max_concurrency=scoring_config.get('max_concurrency', 4),
+                                   max_queue=scoring_config.get('max_queue', 32))
+registry_poll_interval = registry_config.get('poll_interval', 5)
+_swap_lock = asyncio.Lock()
+_failed_version: Optional[str] = None
+
+
+async def swap_pipeline(version: str, commit=None):
+    """
+    Load a bundle off the event loop and make it the active pipeline.
+
+    Requests already scoring keep the pipeline object they started with, so none are dropped.
+    Score cache entries are keyed by version, so they can never be served for the new model;
+    the cache is still cleared so the old version's entries do not take up space until they expire.
+
+    Args:
+        version (str): Registry version to serve.
+        commit: Optional callable recording the change in the registry, run only after a successful load.
+    """
+    global prediction_pipeline
+    async with _swap_lock:
+        pipeline = prediction_pipeline
+        if pipeline.version != version:
+            pipeline = await asyncio.to_thread(load_pipeline, version)
+        if commit is not None:
+            await asyncio.to_thread(commit)
+        if prediction_pipeline is not pipeline:
+            prediction_pipeline = pipeline
+            score_cache.clear()
+            logging.info(f"Now serving model version {version}")
+    return prediction_pipeline
+
+
+async def watch_registry():
+    """Follow the registry's active version, picking up changes made by the CLI or other workers."""
+    global _failed_version
+    while True:
+        await asyncio.sleep(registry_poll_interval)
+        version = None
+        try:
+            version = await asyncio.to_thread(registry.active_version)
+            if version and version not in (prediction_pipeline.version, _failed_version):
+                await swap_pipeline(version)
+        except Exception as e:
+            # Remember the broken bundle so it is not reloaded on every poll.
+            _failed_version = version
+            logging.error(f"Failed to load model version {version}, keeping {prediction_pipeline.version}: {e}")
+
+
+@app.on_event("startup")
+async def start_registry_watch():
+    app.state.registry_watch_task = asyncio.create_task(watch_registry())
+
+
+@app.on_event("shutdown")
+async def stop_registry_watch():
+    app.state.registry_watch_task.cancel()
+    scoring_executor.shutdown()
+
+
+def score_records(records: List[Dict[str, Any]]) -> Tuple[List[list], str]:
+    """
+    Score records, serving repeated feature sets from the cache and the rest in one batch.
+
+    Returns:
+        Tuple[List[list], str]: The scores and the model version that produced them.
+    """
+    pipeline = prediction_pipeline
+    keys = [ScoreCache.fingerprint(record, pipeline.version) for record in records]
+    scores = [score_cache.get(key) for key in keys]
+    missing = [i for i, score in enumerate(scores) if score is None]
+    if missing:
+        predicted = pipeline.predict_records([records[i] for i in missing]).tolist()
+        for i, score in zip(missing, predicted):
+            score_cache.set(keys[i], score)
+            scores[i] = score
+    return scores, pipeline.version
+
+
+async def score_off_loop(records: List[Dict[str, Any]]) -> Tuple[List[list], str]:
+    """Run score_records on the scoring executor, answering 429 when it is saturated."""
+    try:
+        return await scoring_executor.run(score_records, records)
+    except ExecutorSaturated as e:
+        logging.warning(f"Rejecting scoring request: {e}")
+        raise HTTPException(status_code=429, detail="Too many scoring requests in flight, retry later",
+                            headers={"Retry-After": "1"})
+
+
+micro_batch_config = scoring_config.get('micro_batch', {})
+micro_batcher = None
+if micro_batch_config.get('enabled', False):
+    micro_batcher = MicroBatcher(score_off_loop, max_rows=micro_batch_config.get('max_rows', 64),
+                                 max_wait_ms=micro_batch_config.get('window_ms', 2),
+                                 shared_errors=(HTTPException,))
+
 class CustomerData(BaseModel):
     Gender: str
     Senior_Citizen: str
@@ -35,7 +194,22 @@ class CustomerData(BaseModel):
     CLTV: float
 
 class ChurnPredictionResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
     churn_score: list
+    model_version: str
+
+class BatchCustomerData(CustomerData):
+    CustomerID: str
+
+class ChurnBatchRequest(BaseModel):
+    # Customers are validated one by one in predict_churn_batch, so one bad row cannot fail the batch.
+    customers: List[Dict[str, Any]]
+
+class ChurnBatchResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    churn_scores: Dict[str, list]
+    errors: Dict[str, str]
+    model_version: str
 
 @app.post("/predict_churn", response_model=ChurnPredictionResponse)
 async def predict_churn(customer_data: CustomerData):
@@ -43,35 +217,117 @@ async def predict_churn(customer_data: CustomerData):
         raise HTTPException(status_code=500, detail="Prediction pipeline not initialized")
 
     try:
-        input_dict = customer_data.model_dump()
-        input_df = pd.DataFrame([input_dict])
-        logging.info(f"Raw input data: {input_df.to_dict(orient='records')}")
-
-        input_df = input_df.rename(columns={
-            'Senior_Citizen': 'Senior Citizen',
-            'Tenure_Months': 'Tenure Months',
-            'Phone_Service': 'Phone Service',
-            'Internet_Service': 'Internet Service',
-            'Online_Security': 'Online Security',
-            'Online_Backup': 'Online Backup',
-            'Device_Protection': 'Device Protection',
-            'Tech_Support': 'Tech Support',
-            'Streaming_TV': 'Streaming TV',
-            'Streaming_Movies': 'Streaming Movies',
-            'Paperless_Billing': 'Paperless Billing',
-            'Payment_Method': 'Payment Method',
-            'Monthly_Charges': 'Monthly Charges',
-            'Total_Charges': 'Total Charges'
-        })
-
-        churn_score = prediction_pipeline.transform_predict(input_df)[0]
+        record = {COLUMN_RENAMES.get(key, key): value for key, value in customer_data.model_dump().items()}
+        logging.info(f"Raw input data: {record}")
+
+        if micro_batcher is not None:
+            churn_score, model_version = await micro_batcher.submit(record)
+        else:
+            churn_scores, model_version = await score_off_loop([record])
+            churn_score = churn_scores[0]
         logging.info(f"Predicted churn score: {churn_score}")
-        return {"churn_score": churn_score}
+        return {"churn_score": churn_score, "model_version": model_version}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Prediction error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=f"Prediction failed: {str(e)}")
 
+@app.post("/predict_churn_batch", response_model=ChurnBatchResponse)
+async def predict_churn_batch(batch: ChurnBatchRequest):
+    """
+    Score many customers in one vectorized pass, keyed by customer id.
+
+    Each customer is validated on its own, and if the vectorized pass fails the valid customers
+    are scored one at a time, so an invalid row only costs its own score. Customers that could
+    not be scored are reported in errors, keyed by customer id (or by their position in the
+    request when the id itself is missing), instead of failing the whole batch.
+    """
+    if prediction_pipeline is None:
+        raise HTTPException(status_code=500, detail="Prediction pipeline not initialized")
+    if not batch.customers:
+        raise HTTPException(status_code=400, detail="No customers provided")
+
+    customer_ids = []
+    records = []
+    errors = {}
+    for position, customer in enumerate(batch.customers):
+        customer_id = str(customer.get('CustomerID', f"#{position}"))
+        try:
+            record = {COLUMN_RENAMES.get(key, key): value
+                      for key, value in BatchCustomerData.model_validate(customer).model_dump().items()}
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            errors[customer_id] = f"Invalid customer data: {problems}"
+            continue
+        record.pop('CustomerID')
+        customer_ids.append(customer_id)
+        records.append(record)
+    logging.info(f"Scoring batch of {len(records)} customers, {len(errors)} rejected by validation")
+
+    churn_scores = {}
+    model_version = prediction_pipeline.version
+    if records:
+        try:
+            scores, model_version = await score_off_loop(records)
+            churn_scores = dict(zip(customer_ids, scores))
+        except HTTPException:
+            raise
+        except Exception as e:
+            logging.warning(f"Batch prediction failed, scoring {len(records)} customers one by one: {str(e)}")
+            for customer_id, record in zip(customer_ids, records):
+                try:
+                    scores, model_version = await score_off_loop([record])
+                    churn_scores[customer_id] = scores[0]
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    logging.error(f"Prediction failed for customer {customer_id}: {str(e)}")
+                    errors[customer_id] = f"Prediction failed: {str(e)}"
+    return {"churn_scores": churn_scores, "errors": errors, "model_version": model_version}
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """Report score cache hit/miss counters and the active model artifact version."""
+    return {"model_version": prediction_pipeline.version, **score_cache.stats()}
+
+@app.get("/scoring_stats")
+async def scoring_stats():
+    """Report the scoring executor's load and rejection counters and micro-batching histograms for this worker."""
+    return {"pid": os.getpid(), **scoring_executor.stats(),
+            "micro_batching": micro_batcher.stats() if micro_batcher is not None else None}
+
+@app.get("/model")
+async def model_info():
+    """Report the served model version and the registry manifest."""
+    return {"model_version": prediction_pipeline.version, "registry": await asyncio.to_thread(registry.manifest)}
+
+@app.post("/model/activate/{version}")
+async def activate_model(version: str):
+    """Load a published bundle and serve it, recording it as the active version."""
+    if version not in await asyncio.to_thread(registry.versions):
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+    try:
+        pipeline = await swap_pipeline(version, commit=lambda: registry.activate(version))
+    except Exception as e:
+        logging.error(f"Failed to activate model version {version}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to activate model version {version}: {str(e)}")
+    return {"model_version": pipeline.version}
+
+@app.post("/model/rollback")
+async def rollback_model():
+    """Serve the previously active bundle again."""
+    target = await asyncio.to_thread(registry.rollback_target)
+    if target is None:
+        raise HTTPException(status_code=400, detail="No previous model version to roll back to")
+    try:
+        pipeline = await swap_pipeline(target, commit=lambda: registry.rollback(expected=target))
+    except Exception as e:
+        logging.error(f"Failed to roll back to model version {target}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to roll back to model version {target}: {str(e)}")
+    return {"model_version": pipeline.version}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -124,7 +124,7 @@ class CategoricalPreprocessor(BaseEstimator, TransformerMixin):
                     X_transformed[col] = X_transformed[col].map(mapping)
                     if X_transformed[col].isna().any():
                         logging.warning(f"Unknown values found in {col} during binary mapping.")
-                        X_transformed[col].fillna(0, inplace=True)  # Default to 0 for unknown
+                        X_transformed[col] = X_transformed[col].fillna(0)  # Default to 0 for unknown
                 else:
                     logging.warning(f"Binary mapping column {col} not found in input data.")
 
@@ -135,7 +135,7 @@ class CategoricalPreprocessor(BaseEstimator, TransformerMixin):
                         X_transformed[col] = X_transformed[col].map(self.target_encodings[col])
                         if X_transformed[col].isna().any():
                             logging.warning(f"Unknown categories in {col} during target encoding.")
-                            X_transformed[col].fillna(self.target_encodings[col].mean(), inplace=True)
+                            X_transformed[col] = X_transformed[col].fillna(self.target_encodings[col].mean())
                     else:
                         print(f"Target encoding for {col} not fitted.")
                         raise ValueError(f"Target encoding for {col} not fitted.")
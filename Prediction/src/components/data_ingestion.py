@@ -3,13 +3,25 @@ import logging
 import os
 import yaml
 import io
-from typing import Dict, Any
+import json
+import hashlib
+from typing import Dict, Any, List, Optional
 from src.logging import logging
+from src.utilities.fingerprint import content_hash
 from sklearn.base import BaseEstimator, TransformerMixin
 
+SNAPSHOT_FINGERPRINT_KEY = b'source_fingerprint'
+
 
 class DataLoader(BaseEstimator, TransformerMixin):
-    """Class to handle data loading from a specified source with validation and error handling."""
+    """Class to handle data loading from a specified source with validation and error handling.
+
+    With data_source: postgres the dataset is streamed from the postgres_source table (see
+    read_postgres). Otherwise data_path is a file: Parquet sources are read directly. Excel sources are converted once into a Parquet snapshot
+    (data_snapshot_path, by default next to the source) with the dtypes declared in column_dtypes;
+    later runs read the snapshot as long as the source file and the declared dtypes are unchanged.
+    Only the columns listed in cols_to_select are read from Parquet.
+    """
 
     def __init__(self, config_path: str):
         """
@@ -24,6 +36,12 @@ class DataLoader(BaseEstimator, TransformerMixin):
             with open(self.config_path, 'r') as file:
                 self.config: Dict[str, Any] = yaml.safe_load(file)
             self.file_path: str = self.config.get('data_path', '')
+            self.column_dtypes: Dict[str, str] = self.config.get('column_dtypes', {})
+            self.columns: Optional[List[str]] = self.config.get('cols_to_select') or None
+            self.snapshot_path: str = self.config.get('data_snapshot_path') or \
+                f"{os.path.splitext(self.file_path)[0]}.parquet"
+            self.data_source: str = self.config.get('data_source', 'file')
+            self.postgres_source: Dict[str, Any] = self.config.get('postgres_source', {})
             logging.info(
                 "DataLoader initialized with configuration from %s", config_path)
         except Exception as e:
@@ -64,6 +82,131 @@ class DataLoader(BaseEstimator, TransformerMixin):
                 f"No read permission for file {self.file_path}")
         logging.info(f"Validation successful")
 
+    def _apply_dtypes(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast columns to their declared dtypes.
+
+        Numeric columns are parsed with pd.to_numeric, so blank cells (e.g. ' ' in Total Charges)
+        become NaN; 'str' columns keep missing values as NaN and turn everything else into str.
+        An integer column with missing values (e.g. a NULL Tenure Months row in Postgres) cannot
+        hold NaN, so it is cast to the matching nullable dtype (int64 -> Int64) instead.
+        """
+        for col, dtype in self.column_dtypes.items():
+            if col not in data.columns:
+                continue
+            if dtype == 'str':
+                data[col] = data[col].where(data[col].isna(), data[col].astype(str))
+                continue
+            values = pd.to_numeric(data[col], errors='coerce')
+            missing = int(values.isna().sum())
+            if missing and pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(dtype)):
+                dtype = dtype.replace('uint', 'UInt').replace('int', 'Int')
+                logging.warning("Column %s has %d missing values; reading it as nullable %s.", col, missing, dtype)
+            data[col] = values.astype(dtype)
+        return data
+
+    def _source_fingerprint(self) -> str:
+        """Identify the source file contents and dtype declarations a snapshot was built from."""
+        declared = json.dumps(self.column_dtypes, sort_keys=True).encode()
+        return f"{content_hash([self.file_path])}-{hashlib.sha256(declared).hexdigest()[:16]}"
+
+    def _snapshot_is_current(self) -> bool:
+        import pyarrow.parquet as pq
+
+        if not os.path.exists(self.snapshot_path):
+            return False
+        metadata = pq.read_schema(self.snapshot_path).metadata or {}
+        return metadata.get(SNAPSHOT_FINGERPRINT_KEY, b'').decode() == self._source_fingerprint()
+
+    def _write_snapshot(self, data: pd.DataFrame) -> None:
+        """Write the typed dataset to Parquet, tagged with the source fingerprint."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        metadata = {**(table.schema.metadata or {}), SNAPSHOT_FINGERPRINT_KEY: self._source_fingerprint().encode()}
+        tmp_path = f"{self.snapshot_path}.tmp"
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, self.snapshot_path)
+        logging.info("Parquet snapshot of %s written to %s", self.file_path, self.snapshot_path)
+
+    @staticmethod
+    def _db_column(column: str) -> str:
+        """Map a dataset column name to its customer_data column, e.g. 'Tenure Months' -> tenure_months."""
+        return column.lower().replace(' ', '_')
+
+    def read_postgres(self) -> pd.DataFrame:
+        """
+        Stream the training columns from Postgres through a server-side cursor.
+
+        Rows are fetched chunk_size at a time from a named cursor, so the table is never
+        materialized in the client as one result set, and each chunk is converted to a typed
+        DataFrame before the next is fetched. The connection comes from DATABASE_URL, which
+        must be set. Rows without a target value are skipped.
+
+        Returns:
+            pd.DataFrame: The dataset with dataset column names and declared dtypes applied.
+        """
+        import psycopg2
+        from psycopg2 import sql
+
+        table = self.postgres_source.get('table', 'customer_data')
+        chunk_size = self.postgres_source.get('chunk_size', 10000)
+        columns = self.columns or list(self.column_dtypes)
+        target = self.config.get('target')
+        query = sql.SQL("SELECT {columns} FROM {table}").format(
+            columns=sql.SQL(', ').join(sql.Identifier(self._db_column(col)) for col in columns),
+            table=sql.Identifier(table),
+        )
+        if target in columns:
+            query += sql.SQL(" WHERE {target} IS NOT NULL").format(target=sql.Identifier(self._db_column(target)))
+        # A stable order keeps train_test_split reproducible across runs.
+        query += sql.SQL(" ORDER BY {key}").format(key=sql.Identifier(self._db_column(
+            self.postgres_source.get('order_by', 'CustomerID'))))
+
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise RuntimeError("DATABASE_URL is not set; it is required when data_source is postgres.")
+        chunks = []
+        conn = psycopg2.connect(database_url)
+        try:
+            with conn.cursor(name='data_loader') as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(query)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    chunks.append(self._apply_dtypes(pd.DataFrame.from_records(rows, columns=columns)))
+        finally:
+            conn.close()
+        logging.info("Streamed %d rows in %d chunks from table %s",
+                     sum(len(chunk) for chunk in chunks), len(chunks), table)
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(chunks, ignore_index=True)
+
+    def read(self) -> pd.DataFrame:
+        """
+        Read the dataset, pruned to cols_to_select.
+
+        Returns:
+            pd.DataFrame: The dataset with declared dtypes applied.
+        """
+        if self.data_source == 'postgres':
+            return self.read_postgres()
+        if self.file_path.endswith('.parquet'):
+            return pd.read_parquet(self.file_path, columns=self.columns)
+        if self._snapshot_is_current():
+            logging.info("Reading Parquet snapshot %s", self.snapshot_path)
+            return pd.read_parquet(self.snapshot_path, columns=self.columns)
+
+        logging.info("No current snapshot of %s; converting it to Parquet.", self.file_path)
+        data = self._apply_dtypes(pd.read_excel(self.file_path))
+        # The snapshot keeps every column, so changing cols_to_select needs no reconversion.
+        self._write_snapshot(data)
+        return data[self.columns] if self.columns else data
+
     def fit(self, X=None, y=None):
         """Fit method for pipeline compatibility (no-op)."""
         logging.info("Data loader fit.")
@@ -78,16 +221,18 @@ class DataLoader(BaseEstimator, TransformerMixin):
         """
         logging.info(f"Data loader transform started")
         try:
-            self.validate_file()
-            data = pd.read_excel(self.file_path)
+            if self.data_source != 'postgres':
+                self.validate_file()
+            data = self.read()
             logging.info("Data loaded successfully from %s. Shape: %s",
-                         self.file_path, data.shape)
+                         self.data_source if self.data_source == 'postgres' else self.file_path, data.shape)
 
             if data.empty:
                 raise ValueError("Loaded dataset is empty.")
-            if data.duplicated().any():
+            duplicates = int(data.duplicated().sum())
+            if duplicates:
                 logging.warning(
-                    "Dataset contains %d duplicate rows. Consider deduplication.", data.duplicated().sum())
+                    "Dataset contains %d duplicate rows. Consider deduplication.", duplicates)
             logging.info("Data Loader transformation completed.")
             return data
         except pd.errors.EmptyDataError:
@@ -98,3 +243,4 @@ class DataLoader(BaseEstimator, TransformerMixin):
             logging.error("Error loading data from %s: %s",
                           self.file_path, str(e))
             raise
+
@@ -4,6 +4,7 @@ from sklearn.base import BaseEstimator, TransformerMixin
 import yaml
 import pandas as pd
 import io
+import os
 
 
 class FeatureExtraction(BaseEstimator, TransformerMixin):
@@ -58,13 +59,17 @@ class FeatureExtraction(BaseEstimator, TransformerMixin):
         # selected_features = X.drop(self.cols_to_remove, axis=1)
         try:
             logging.info(f"Feature Extraction transform started..")
+            # DataLoader already prunes the data to cols_to_select; only the dataset columns it
+            # pruned may be missing, anything else in cols_to_drop is a configuration error.
+            pruned_cols = set(self.config.get('columns', [])) - set(self.cols_to_select) \
+                if self.cols_to_select else set()
             invalid_cols = [
-                col for col in self.cols_to_remove if col not in X.columns]
+                col for col in self.cols_to_remove if col not in X.columns and col not in pruned_cols]
             if invalid_cols:
                 raise ValueError(
                     f"Columns to remove not found in data: {invalid_cols}")
             filtered_data = X.drop(
-                columns=self.cols_to_remove, axis=1, errors='ignore')
+                columns=self.cols_to_remove, errors='ignore')
             if self.cols_to_select:
                 missing_cols = [
                     col for col in self.cols_to_select if col not in filtered_data.columns]
@@ -78,7 +83,11 @@ class FeatureExtraction(BaseEstimator, TransformerMixin):
             numerical_cols = numeric_data.columns.tolist()
             self._update_config(categorical_cols, numerical_cols)
             if self.selected_data_path:
-                filtered_data.to_excel(self.selected_data_path, index=False)
+                os.makedirs(os.path.dirname(self.selected_data_path) or '.', exist_ok=True)
+                if self.selected_data_path.endswith('.parquet'):
+                    filtered_data.to_parquet(self.selected_data_path, index=False)
+                else:
+                    filtered_data.to_excel(self.selected_data_path, index=False)
             logging.info(f"Feature Extraction transform ended.")
             return filtered_data
         except Exception as e:
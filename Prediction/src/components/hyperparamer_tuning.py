@@ -1,12 +1,169 @@
+import math
+import time
+import numpy as np
 import pandas as pd
 import yaml
+from joblib import Memory, Parallel, delayed
+from sklearn.base import clone
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import GridSearchCV
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
 from src.logging import logging
-from typing import Dict, Any
+from src.utilities.fingerprint import code_version
+from typing import Dict, Any, List, Optional, Tuple
+
+# Solvers that reuse coef_ from the previous fit when warm_start=True; liblinear ignores it.
+WARM_START_SOLVERS = {'lbfgs', 'newton-cg', 'newton-cholesky', 'sag', 'saga'}
+
+
+def stratified_order(y: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Shuffle row positions so that every prefix keeps the class ratio of y.
+
+    Each class is shuffled on its own and its rows are spread evenly over the order, so the
+    first n positions hold each class in proportion to its share of y, up to one row.
+
+    Args:
+        y (np.ndarray): Labels of the rows to order.
+        rng (np.random.Generator): Source of the shuffles.
+
+    Returns:
+        np.ndarray: A permutation of range(len(y)).
+    """
+    positions = np.empty(len(y))
+    for label in np.unique(y):
+        rows = rng.permutation(np.flatnonzero(y == label))
+        positions[rows] = (np.arange(len(rows)) + rng.uniform()) / len(rows)
+    return np.argsort(positions, kind='stable')
+
+
+def make_folds(X: pd.DataFrame, y: pd.Series, cv: int = 5, random_state: int = 42) -> List[Tuple]:
+    """Slice the training data into stratified folds once, so every candidate reuses the same arrays.
+
+    Args:
+        X (pd.DataFrame): Training features.
+        y (pd.Series): Training labels.
+        cv (int): Number of folds.
+        random_state (int): Seed of the row order used to subsample fold training data.
+
+    Returns:
+        List[Tuple]: (X_fit, y_fit, X_val, y_val, order) per fold, where order is a stratified
+            random permutation of the fit rows; its first n entries form a subsample of n rows
+            with the fold's class ratio.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    rng = np.random.default_rng(random_state)
+    folds = []
+    for fit_idx, val_idx in StratifiedKFold(n_splits=cv).split(X, y):
+        folds.append((X[fit_idx], y[fit_idx], X[val_idx], y[val_idx], stratified_order(y[fit_idx], rng)))
+    return folds
+
+
+def fit_fold_pipeline(preprocessor: Any, balancer: Any, X: pd.DataFrame, y: pd.Series,
+                      fit_idx: np.ndarray, val_idx: np.ndarray, cache_key: str = '') -> Tuple[Any, Tuple]:
+    """Fit fresh copies of the preprocessing and resampling pipelines on one fold's training rows.
+
+    Args:
+        preprocessor: Preprocessing pipeline; a clone is fitted on the fold's training rows.
+        balancer: Resampling pipeline with fit_resample; a clone resamples the fold's training rows.
+        X (pd.DataFrame): Raw training features.
+        y (pd.Series): Training labels.
+        fit_idx (np.ndarray): Positions of the fold's training rows.
+        val_idx (np.ndarray): Positions of the fold's validation rows.
+        cache_key (str): Not used by the fit; part of the memoization key so cached folds are
+            invalidated when the pipelines' code or the configured cache version changes.
+
+    Returns:
+        Tuple[Any, Tuple]: The fitted preprocessor and (X_fit, y_fit, X_val, y_val) arrays, where
+            only the training rows are resampled.
+    """
+    preprocessor = clone(preprocessor)
+    X_fit = preprocessor.fit_transform(X.iloc[fit_idx], y.iloc[fit_idx])
+    X_val = preprocessor.transform(X.iloc[val_idx])
+    X_fit, y_fit = clone(balancer).fit_resample(X_fit, y.iloc[fit_idx])
+    return preprocessor, (np.ascontiguousarray(X_fit, dtype=np.float64), np.asarray(y_fit),
+                          np.ascontiguousarray(X_val, dtype=np.float64), np.asarray(y.iloc[val_idx]))
+
+
+def make_pipeline_folds(X: pd.DataFrame, y: pd.Series, preprocessor: Any, balancer: Any, cv: int = 5,
+                        random_state: int = 42, memory: Optional[Memory] = None,
+                        n_jobs: Optional[int] = -1, cache_version: Optional[str] = None) -> List[Tuple]:
+    """Build leakage-free folds by refitting preprocessing and resampling inside each fold.
+
+    Folds are prepared in parallel and memoized with memory, keyed on the data, the fold rows,
+    the pipelines' parameters (including the configuration they loaded) and a hash of the code
+    they run (see code_version), so repeated tuning runs on unchanged data and code load the
+    fitted folds from disk. cache_version invalidates the folds by hand, e.g. after a change
+    outside the project's modules that the code hash cannot see.
+
+    Args:
+        X (pd.DataFrame): Raw training features.
+        y (pd.Series): Training labels.
+        preprocessor: Preprocessing pipeline.
+        balancer: Resampling pipeline with fit_resample.
+        cv (int): Number of folds.
+        random_state (int): Seed of the row order used to subsample fold training data.
+        memory (Optional[Memory]): joblib Memory caching the fitted folds; None disables caching.
+        n_jobs (Optional[int]): Folds prepared in parallel.
+        cache_version (Optional[str]): Extra salt of the memoization key.
+
+    Returns:
+        List[Tuple]: (X_fit, y_fit, X_val, y_val, order) per fold, as from make_folds.
+    """
+    memory = memory or Memory(None, verbose=0)
+    fit_fold = memory.cache(fit_fold_pipeline)
+    cache_key = f"{code_version(preprocessor, balancer)}:{cache_version or ''}" if memory.location else ''
+    splits = list(StratifiedKFold(n_splits=cv).split(X, y))
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(fit_fold)(preprocessor, balancer, X, y, fit_idx, val_idx, cache_key) for fit_idx, val_idx in splits)
+    rng = np.random.default_rng(random_state)
+    return [(X_fit, y_fit, X_val, y_val, stratified_order(y_fit, rng))
+            for _, (X_fit, y_fit, X_val, y_val) in fitted]
+
+
+def fit_regularization_path(params: Dict[str, Any], Cs: List[float], fold: Tuple, n_rows: int,
+                            warm_start: bool) -> List[Tuple[float, float, float, float]]:
+    """Fit one fold for every C of a candidate group, weakest regularization last.
+
+    With warm_start, each fit starts from the coefficients of the previous, more strongly
+    regularized one, which is close to the new optimum, so the solver needs few iterations.
+
+    Args:
+        params (Dict[str, Any]): LogisticRegression parameters shared by the group, except C.
+        Cs (List[float]): Values of C to fit.
+        fold (Tuple): Fold from make_folds.
+        n_rows (int): Number of fit rows to train on.
+        warm_start (bool): Reuse the previous solution along the path.
+
+    Returns:
+        List[Tuple[float, float, float, float]]: (C, f1 score, fit seconds, score seconds) per C;
+            the score is nan if the parameters are invalid.
+    """
+    X_fit, y_fit, X_val, y_val, order = fold
+    if n_rows < len(order):
+        rows = np.sort(order[:n_rows])
+        X_fit, y_fit = X_fit[rows], y_fit[rows]
+    model = LogisticRegression(**params, random_state=42,
+                               warm_start=warm_start and params.get('solver', 'lbfgs') in WARM_START_SOLVERS)
+    results = []
+    for C in sorted(Cs):
+        model.set_params(C=C)
+        start = time.perf_counter()
+        try:
+            model.fit(X_fit, y_fit)
+        except ValueError as e:
+            results.append((C, float('nan'), time.perf_counter() - start, 0.0))
+            logging.warning(f"Skipping invalid candidate {params} with C={C}: {str(e)}")
+            continue
+        fit_time = time.perf_counter() - start
+        start = time.perf_counter()
+        score = f1_score(y_val, model.predict(X_val))
+        results.append((C, score, fit_time, time.perf_counter() - start))
+    return results
+
 
 class HyperparameterTuner:
-    """Class to perform hyperparameter tuning for Logistic Regression using GridSearchCV."""
+    """Class to perform hyperparameter tuning for Logistic Regression with grid, randomized or successive-halving search."""
 
     def __init__(self, config_path: str):
         """Initialize the HyperparameterTuner with configuration.
@@ -20,12 +177,136 @@ class HyperparameterTuner:
             with open(config_path, 'r') as file:
                 self.config: Dict[str, Any] = yaml.safe_load(file)
             self.param_grid = self.config.get('param_grid', {})
+            search_config = self.config.get('hyperparameter_search', {})
+            self.method = search_config.get('method', 'grid')
+            self.cv = search_config.get('cv', 5)
+            self.n_iter = search_config.get('n_iter', 10)
+            self.factor = search_config.get('factor', 3)
+            self.min_resources = search_config.get('min_resources', 500)
+            self.warm_start = search_config.get('warm_start', True)
+            self.n_jobs = search_config.get('n_jobs', -1)
+            self.cv_mode = search_config.get('cv_mode', 'resampled')
+            self.cache_dir = search_config.get('cache_dir')
+            self.cache_version = search_config.get('cache_version')
+            self.cache_bytes_limit = search_config.get('cache_bytes_limit', '1G')
+            if self.method not in ('grid', 'random', 'halving'):
+                raise ValueError(f"Unknown hyperparameter search method '{self.method}'")
+            if self.cv_mode not in ('resampled', 'pipeline'):
+                raise ValueError(f"Unknown cross-validation mode '{self.cv_mode}'")
+            grids = self.param_grid if isinstance(self.param_grid, list) else [self.param_grid]
+            if self.warm_start and not any(set(grid.get('solver', ['lbfgs'])) & WARM_START_SOLVERS for grid in grids):
+                logging.warning("warm_start has no effect: no solver in param_grid supports it.")
+            self.cv_results_: List[Dict[str, Any]] = []
         except Exception as e:
             logging.error(f"Failed to load config.yaml file: {str(e)}")
             raise RuntimeError(f"Failed to load config.yaml file: {str(e)}")
 
+    def candidates(self) -> List[Dict[str, Any]]:
+        """Return the parameter combinations to search for the configured method."""
+        if self.method == 'random':
+            return list(ParameterSampler(self.param_grid, n_iter=self.n_iter, random_state=42))
+        return list(ParameterGrid(self.param_grid))
+
+    def evaluate(self, candidates: List[Dict[str, Any]], folds: List[Tuple], n_rows: int,
+                 search_round: int = 0) -> List[Dict[str, Any]]:
+        """Cross-validate candidates on the first n_rows of every fold's shuffled training data.
+
+        Candidates that differ only in C are fitted as one warm-started regularization path per
+        fold; the (group, fold) paths run in parallel.
+
+        Args:
+            candidates (List[Dict[str, Any]]): Parameter combinations.
+            folds (List[Tuple]): Folds from make_folds.
+            n_rows (int): Training rows used per fold.
+            search_round (int): Halving round, recorded in the results.
+
+        Returns:
+            List[Dict[str, Any]]: One result per candidate with its mean and std F1 score and
+                mean fit and score times, in the order of candidates.
+        """
+        groups: Dict[Tuple, List[float]] = {}
+        for params in candidates:
+            shared = tuple(sorted((key, value) for key, value in params.items() if key != 'C'))
+            groups.setdefault(shared, []).append(params.get('C', 1.0))
+        tasks = [(shared, Cs, fold) for shared, Cs in groups.items() for fold in folds]
+        paths = Parallel(n_jobs=self.n_jobs)(
+            delayed(fit_regularization_path)(dict(shared), Cs, fold, n_rows, self.warm_start)
+            for shared, Cs, fold in tasks)
+
+        per_fold: Dict[Tuple, List[Tuple[float, float, float]]] = {}
+        for (shared, _, _), path in zip(tasks, paths):
+            for C, score, fit_time, score_time in path:
+                per_fold.setdefault((shared, C), []).append((score, fit_time, score_time))
+
+        results = []
+        for params in candidates:
+            shared = tuple(sorted((key, value) for key, value in params.items() if key != 'C'))
+            scores, fit_times, score_times = map(np.array, zip(*per_fold[(shared, params.get('C', 1.0))]))
+            results.append({
+                'params': params,
+                'round': search_round,
+                'n_rows': n_rows,
+                'mean_score': float(np.mean(scores)),
+                'std_score': float(np.std(scores)),
+                'mean_fit_time': float(np.mean(fit_times)),
+                'mean_score_time': float(np.mean(score_times)),
+            })
+        return results
+
+    def search(self, folds: List[Tuple]) -> Dict[str, Any]:
+        """Run the configured search over prepared folds.
+
+        'grid' scores every combination of param_grid and 'random' n_iter sampled ones, both on
+        all training rows. 'halving' runs successive halving: all combinations are scored on a
+        small subsample of each fold, only the best 1/factor of them advance to a round with
+        factor times more rows, and the last round uses all rows. Per-candidate scores and
+        timings are logged and kept in cv_results_.
+
+        Args:
+            folds (List[Tuple]): Folds from make_folds or make_pipeline_folds.
+
+        Returns:
+            Dict[str, Any]: Best parameters found.
+        """
+        start = time.perf_counter()
+        max_rows = min(len(fold[4]) for fold in folds)
+        candidates = self.candidates()
+        self.cv_results_ = []
+
+        if self.method == 'halving':
+            required_rounds = 1 + int(math.log(len(candidates), self.factor)) if len(candidates) > 1 else 1
+            possible_rounds = 1 + int(math.log(max(max_rows // self.min_resources, 1), self.factor))
+            n_rounds = min(required_rounds, possible_rounds)
+        else:
+            n_rounds = 1
+
+        for search_round in range(n_rounds):
+            n_rows = max_rows // self.factor ** (n_rounds - 1 - search_round)
+            results = self.evaluate(candidates, folds, n_rows, search_round)
+            self.cv_results_.extend(results)
+            logging.info(f"Round {search_round}: {len(candidates)} candidates on {n_rows} rows per fold")
+            ranked = sorted((r for r in results if not np.isnan(r['mean_score'])),
+                            key=lambda r: r['mean_score'], reverse=True)
+            if not ranked:
+                raise ValueError("No valid parameter combination in param_grid.")
+            candidates = [r['params'] for r in ranked[:max(math.ceil(len(ranked) / self.factor), 1)]]
+
+        for result in self.cv_results_:
+            logging.info(f"Round {result['round']} ({result['n_rows']} rows) {result['params']}: "
+                         f"F1 {result['mean_score']:.4f} +/- {result['std_score']:.4f}, "
+                         f"fit {result['mean_fit_time'] * 1000:.1f} ms, "
+                         f"score {result['mean_score_time'] * 1000:.1f} ms")
+        logging.info(f"Hyperparameter tuning completed successfully: {len(self.cv_results_) * len(folds)} fits "
+                     f"in {time.perf_counter() - start:.2f} s.")
+
+        best_params = ranked[0]['params']
+        best_score = ranked[0]['mean_score']
+        logging.info(f"Best parameters: {best_params}")
+        logging.info(f"Best F1 score: {best_score}")
+        return best_params
+
     def tune(self, X_train: pd.DataFrame, y_train: pd.Series) -> Dict[str, Any]:
-        """Perform hyperparameter tuning using GridSearchCV.
+        """Perform hyperparameter tuning with the configured search method on already preprocessed data.
 
         Args:
             X_train (pd.DataFrame): Training features.
@@ -35,34 +316,51 @@ class HyperparameterTuner:
             Dict[str, Any]: Best parameters found during tuning.
         """
         try:
-            logging.info("Starting hyperparameter tuning with GridSearchCV...")
+            logging.info(f"Starting hyperparameter tuning with {self.method} search...")
 
             if X_train.empty or y_train.empty:
                 raise ValueError("Training data or labels are empty.")
 
-            model = LogisticRegression(random_state=42)
+            return self.search(make_folds(X_train, y_train, cv=self.cv))
+        except Exception as e:
+            logging.error(f"Error in HyperparameterTuner tune: {str(e)}")
+            raise RuntimeError(f"Error in HyperparameterTuner tune: {str(e)}")
 
-            grid_search = GridSearchCV(
-                estimator=model,
-                param_grid=self.param_grid,
-                cv=5,
-                scoring='f1',
-                n_jobs=-1,
-                verbose=1
-            )
+    def tune_pipeline(self, X_train: pd.DataFrame, y_train: pd.Series, preprocessor: Any,
+                      balancer: Any) -> Dict[str, Any]:
+        """Perform hyperparameter tuning on raw data, refitting preprocessing and resampling per fold.
 
-            grid_search.fit(X_train, y_train)
-            logging.info("Hyperparameter tuning completed successfully.")
+        Unlike tune on data that was preprocessed and resampled as a whole, no target encoding
+        or SMOTE neighbour ever sees a validation row, and validation rows are scored as they
+        are, without resampling. Fitted folds are cached in cache_dir, which is trimmed to
+        cache_bytes_limit after each run, evicting the least recently used folds first.
 
-            best_params = grid_search.best_params_
-            best_score = grid_search.best_score_
-            logging.info(f"Best parameters: {best_params}")
-            logging.info(f"Best F1 score: {best_score}")
+        Args:
+            X_train (pd.DataFrame): Raw training features.
+            y_train (pd.Series): Training labels.
+            preprocessor: Unfitted or fitted preprocessing pipeline; a clone is fitted per fold.
+            balancer: Resampling pipeline with fit_resample; a clone is fitted per fold.
 
-            return best_params
+        Returns:
+            Dict[str, Any]: Best parameters found during tuning.
+        """
+        try:
+            logging.info(f"Starting leakage-free hyperparameter tuning with {self.method} search...")
+
+            if X_train.empty or y_train.empty:
+                raise ValueError("Training data or labels are empty.")
+
+            start = time.perf_counter()
+            memory = Memory(self.cache_dir, verbose=0)
+            folds = make_pipeline_folds(X_train, y_train, preprocessor, balancer, cv=self.cv, memory=memory,
+                                        n_jobs=self.n_jobs, cache_version=self.cache_version)
+            if self.cache_dir is not None and self.cache_bytes_limit is not None:
+                memory.reduce_size(bytes_limit=self.cache_bytes_limit)
+            logging.info(f"Prepared {len(folds)} folds in {time.perf_counter() - start:.2f} s.")
+            return self.search(folds)
         except Exception as e:
-            logging.error(f"Error in HyperparameterTuner tune: {str(e)}")
-            raise RuntimeError(f"Error in HyperparameterTuner tune: {str(e)}")
+            logging.error(f"Error in HyperparameterTuner tune_pipeline: {str(e)}")
+            raise RuntimeError(f"Error in HyperparameterTuner tune_pipeline: {str(e)}")
 
     def update_config(self, best_params: Dict[str, Any]):
         """Update the config file with the best parameters.
@@ -83,3 +381,4 @@ class HyperparameterTuner:
         except Exception as e:
             logging.error(f"Error updating config with best parameters: {str(e)}")
             raise RuntimeError(f"Error updating config with best parameters: {str(e)}")
+
@@ -12,9 +12,13 @@ class Undersampler(BaseEstimator):
         percentile (float): Percentile threshold to differentiate sparse and dense points.
         eps (float): DBSCAN eps parameter for clustering dense points.
         min_samples (int): DBSCAN min_samples parameter.
+        scalable (bool): Use chunked tree-index neighbor queries with bounded memory.
+        n_jobs (int): Parallel jobs for neighbor queries in the scalable mode.
+        chunk_size (int): Points queried at once in the scalable mode.
     """
 
-    def __init__(self, k: int = 5, percentile: float = 20, eps: float = 0.5, min_samples: int = 2):
+    def __init__(self, k: int = 5, percentile: float = 20, eps: float = 0.5, min_samples: int = 2,
+                 scalable: bool = False, n_jobs: int = None, chunk_size: int = 10000):
         """Initialize the Undersampler with parameters for the undersampling process.
 
         Args:
@@ -22,12 +26,18 @@ class Undersampler(BaseEstimator):
             percentile (float): Percentile threshold to differentiate sparse and dense points (default=20).
             eps (float): DBSCAN eps parameter for clustering dense points (default=0.5).
             min_samples (int): DBSCAN min_samples parameter (default=2).
+            scalable (bool): Use chunked tree-index neighbor queries with bounded memory; gives the same result (default=False).
+            n_jobs (int): Parallel jobs for neighbor queries in the scalable mode (default=None).
+            chunk_size (int): Points queried at once in the scalable mode (default=10000).
         """
         logging.info(f"Under Sampler Initalizied.")
         self.k = k
         self.percentile = percentile
         self.eps = eps
         self.min_samples = min_samples
+        self.scalable = scalable
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
 
     def fit_resample(self, X: pd.DataFrame, y: pd.Series) -> Tuple[pd.DataFrame, pd.Series]:
         """Undersample the majority class in the dataset.
@@ -67,7 +77,10 @@ class Undersampler(BaseEstimator):
                 k=self.k,
                 percentile=self.percentile,
                 eps=self.eps,
-                min_samples=self.min_samples
+                min_samples=self.min_samples,
+                scalable=self.scalable,
+                n_jobs=self.n_jobs,
+                chunk_size=self.chunk_size
             )
 
             X_reduced = pd.concat([X_majority_reduced, X_minority], axis=0).reset_index(drop=True)
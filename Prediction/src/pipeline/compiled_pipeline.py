@@ -0,0 +1,260 @@
+# src/pipeline/compiled_pipeline.py
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from src.logging import logging
+
+# API field names -> training column names
+COLUMN_RENAMES = {
+    'Senior_Citizen': 'Senior Citizen',
+    'Tenure_Months': 'Tenure Months',
+    'Phone_Service': 'Phone Service',
+    'Internet_Service': 'Internet Service',
+    'Online_Security': 'Online Security',
+    'Online_Backup': 'Online Backup',
+    'Device_Protection': 'Device Protection',
+    'Tech_Support': 'Tech Support',
+    'Streaming_TV': 'Streaming TV',
+    'Streaming_Movies': 'Streaming Movies',
+    'Paperless_Billing': 'Paperless Billing',
+    'Payment_Method': 'Payment Method',
+    'Monthly_Charges': 'Monthly Charges',
+    'Total_Charges': 'Total Charges'
+}
+
+EXPORT_FORMAT_VERSION = 1
+EXPORT_ARRAYS = ['coef', 'affine_idx', 'affine_mult', 'affine_shift', 'code_values']
+
+
+class CompiledPredictionPipeline:
+    """Pandas-free scoring plan compiled from fitted preprocessors and a logistic-regression model.
+
+    Categorical columns become per-column code tables (label, binary, target and one-hot
+    encodings all reduce to a value -> float lookup), the log + RobustScaler step is folded
+    into one affine transform and the model is reduced to a coefficient vector.
+
+    A compiled plan can be exported with save() as flat .npy arrays plus a JSON schema and
+    loaded back with load(), which needs neither scikit-learn, pandas nor unpickling and
+    memory-maps the arrays so several worker processes share their pages.
+    """
+
+    def __init__(self, cat_preprocessor, num_preprocessor, model):
+        """
+        Compile fitted preprocessors and model into flat NumPy lookup tables.
+
+        Args:
+            cat_preprocessor (CategoricalPreprocessor): Fitted categorical preprocessor.
+            num_preprocessor (NumericalPreprocessor): Fitted numerical preprocessor.
+            model (LogisticRegression): Fitted binary logistic-regression model.
+        """
+        from sklearn.linear_model import LogisticRegression
+
+        self.version: Optional[str] = None
+        if not isinstance(model, LogisticRegression) or model.coef_.shape[0] != 1:
+            raise ValueError("Compiled inference requires a binary LogisticRegression model.")
+        if not hasattr(model, 'feature_names_in_'):
+            raise ValueError("Compiled inference requires a model fitted on a DataFrame.")
+
+        self.feature_names: List[str] = list(model.feature_names_in_)
+        self.coef = model.coef_[0].astype(np.float64)
+        self.intercept = float(model.intercept_[0])
+
+        # feature name -> (source column, code table, code for unknown values or None to reject)
+        self.code_tables: Dict[str, tuple] = {}
+        self._compile_categorical(cat_preprocessor)
+
+        self.total_charges_fill = float(num_preprocessor.total_charges_imputer.statistics_[0])
+        self._compile_numerical(num_preprocessor)
+        logging.info(f"Compiled prediction plan with {len(self.feature_names)} features.")
+
+    def _compile_categorical(self, cat_preprocessor):
+        """Build value -> code tables for every categorical encoding strategy."""
+        classes = cat_preprocessor.label_encoder.classes_
+        for col in cat_preprocessor.label_encode_cols:
+            self.code_tables[col] = (col, {value: float(code) for code, value in enumerate(classes)}, None)
+
+        for col, mapping in cat_preprocessor.binary_map_cols.items():
+            self.code_tables[col] = (col, {value: float(code) for value, code in mapping.items()}, 0.0)
+
+        for col in cat_preprocessor.target_encode_cols:
+            encoding = cat_preprocessor.target_encodings.get(col)
+            if encoding is None:
+                continue
+            self.code_tables[col] = (col, {value: float(code) for value, code in encoding.items()},
+                                     float(encoding.mean()))
+
+        for col, encoder in cat_preprocessor.onehot_encoders.items():
+            prefix = cat_preprocessor.onehot_prefixes[col]
+            for category in encoder.categories_[0]:
+                self.code_tables[f"{prefix}_{category}"] = (col, {category: 1.0}, 0.0)
+
+    def _compile_numerical(self, num_preprocessor):
+        """Fold the log transform and RobustScaler into one affine step per scaled column."""
+        log_transform = num_preprocessor.scaling_pipeline.named_steps['log_transform']
+        scaler = num_preprocessor.scaling_pipeline.named_steps['scaler']
+        center = scaler.center_ if scaler.with_centering else np.zeros(len(num_preprocessor.scale_cols))
+        scale = scaler.scale_ if scaler.with_scaling else np.ones(len(num_preprocessor.scale_cols))
+
+        self.log_offset = float(log_transform.offset)
+        self.affine_idx = np.array([self.feature_names.index(col) for col in num_preprocessor.scale_cols])
+        self.affine_mult = 1.0 / np.asarray(scale, dtype=np.float64)
+        self.affine_shift = -np.asarray(center, dtype=np.float64) * self.affine_mult
+
+    def _total_charges(self, value: Any) -> float:
+        """Mirror NumericalPreprocessor: keep numeric values, impute anything else with the median."""
+        if isinstance(value, (int, float)) and not math.isnan(value):
+            return float(value)
+        return self.total_charges_fill
+
+    def transform(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Encode raw records into the model feature matrix.
+
+        Args:
+            records (List[Dict[str, Any]]): Rows keyed by the training column names.
+
+        Returns:
+            numpy.ndarray: Feature matrix of shape (n_records, n_features).
+        """
+        X = np.empty((len(records), len(self.feature_names)), dtype=np.float64)
+        try:
+            for j, name in enumerate(self.feature_names):
+                if name in self.code_tables:
+                    source, table, unknown = self.code_tables[name]
+                    column = [table.get(record[source], unknown) for record in records]
+                    if unknown is None and None in column:
+                        bad = {record[source] for record in records if record[source] not in table}
+                        raise ValueError(f"Unknown values in {source}: {sorted(map(str, bad))}")
+                elif name == 'Total Charges':
+                    column = [self._total_charges(record.get(name)) for record in records]
+                else:
+                    column = [record[name] for record in records]
+                X[:, j] = column
+        except KeyError as e:
+            raise ValueError(f"Missing input feature: {e}")
+        except TypeError as e:
+            raise ValueError(f"Invalid input value: {e}")
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            X[:, self.affine_idx] = np.log(X[:, self.affine_idx] + self.log_offset) * self.affine_mult + self.affine_shift
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN, infinity or a value out of range.")
+        return X
+
+    def predict_proba(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Predict class probabilities with the compiled plan.
+
+        Args:
+            records (List[Dict[str, Any]]): Rows keyed by the training column names.
+
+        Returns:
+            numpy.ndarray: Array of shape (n_records, 2) matching LogisticRegression.predict_proba.
+        """
+        decision = self.transform(records) @ self.coef + self.intercept
+        positive = 1.0 / (1.0 + np.exp(-decision))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict_records(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """Alias of predict_proba, so a loaded plan can stand in for a PredictionPipeline."""
+        return self.predict_proba(records)
+
+    def save(self, directory: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Export the plan as .npy arrays plus schema.json.
+
+        Args:
+            directory (str): Output directory, created if missing.
+            metadata (Optional[Dict[str, Any]]): Extra details stored in the schema, e.g. the parity difference.
+        """
+        os.makedirs(directory, exist_ok=True)
+        code_tables = []
+        code_values = []
+        for name, (source, table, unknown) in self.code_tables.items():
+            keys = [key.item() if isinstance(key, np.generic) else key for key in table]
+            code_tables.append({'feature': name, 'source': source, 'keys': keys, 'unknown': unknown})
+            code_values.extend(table.values())
+
+        arrays = {
+            'coef': self.coef,
+            'affine_idx': self.affine_idx.astype(np.int64),
+            'affine_mult': self.affine_mult,
+            'affine_shift': self.affine_shift,
+            'code_values': np.asarray(code_values, dtype=np.float64),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+        schema = {
+            'format_version': EXPORT_FORMAT_VERSION,
+            'feature_names': self.feature_names,
+            'intercept': self.intercept,
+            'log_offset': self.log_offset,
+            'total_charges_fill': self.total_charges_fill,
+            'code_tables': code_tables,
+            'arrays': {name: {'dtype': str(array.dtype), 'shape': list(array.shape)} for name, array in arrays.items()},
+            'metadata': metadata or {},
+        }
+        with open(os.path.join(directory, 'schema.json'), 'w') as file:
+            json.dump(schema, file, indent=2)
+        logging.info(f"Exported compiled prediction plan to {directory}")
+
+    @classmethod
+    def load(cls, directory: str, version: Optional[str] = None, mmap_mode: Optional[str] = 'r'):
+        """
+        Load a plan exported with save().
+
+        Args:
+            directory (str): Directory written by save().
+            version (Optional[str]): Model version reported by the loaded plan.
+            mmap_mode (Optional[str]): Passed to np.load; 'r' maps the arrays read-only, None reads them into memory.
+
+        Returns:
+            CompiledPredictionPipeline: The loaded plan.
+        """
+        with open(os.path.join(directory, 'schema.json'), 'r') as file:
+            schema = json.load(file)
+        if schema.get('format_version') != EXPORT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled plan format: {schema.get('format_version')}")
+
+        arrays = {}
+        for name in EXPORT_ARRAYS:
+            array = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+            expected = schema['arrays'][name]
+            if str(array.dtype) != expected['dtype'] or list(array.shape) != expected['shape']:
+                raise ValueError(f"Compiled plan array {name} does not match its schema.")
+            arrays[name] = array
+
+        plan = cls.__new__(cls)
+        plan.version = version
+        plan.feature_names = schema['feature_names']
+        plan.intercept = schema['intercept']
+        plan.log_offset = schema['log_offset']
+        plan.total_charges_fill = schema['total_charges_fill']
+        plan.coef = arrays['coef']
+        plan.affine_idx = arrays['affine_idx']
+        plan.affine_mult = arrays['affine_mult']
+        plan.affine_shift = arrays['affine_shift']
+
+        plan.code_tables = {}
+        values = arrays['code_values'].tolist()
+        offset = 0
+        for table in schema['code_tables']:
+            keys = table['keys']
+            plan.code_tables[table['feature']] = (table['source'], dict(zip(keys, values[offset:offset + len(keys)])),
+                                                  table['unknown'])
+            offset += len(keys)
+        if offset != len(values):
+            raise ValueError("Compiled plan code tables do not match the stored code values.")
+        logging.info(f"Loaded compiled prediction plan from {directory}")
+        return plan
+
+    def max_abs_difference(self, reference: np.ndarray, records: List[Dict[str, Any]]) -> Optional[float]:
+        """Return the largest absolute deviation from reference probabilities for the given records."""
+        if not records:
+            return None
+        return float(np.max(np.abs(self.predict_proba(records) - reference)))
+
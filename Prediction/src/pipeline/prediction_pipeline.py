@@ -1,30 +1,47 @@
 # src/pipeline/prediction_pipeline.py
+import json
+from typing import Any, Dict, List, Optional
 import pandas as pd
 from src.pipeline.data_pipeline import DataLoadSplitPipeline
+from src.pipeline.compiled_pipeline import CompiledPredictionPipeline, COLUMN_RENAMES
 from src.components.category_preprocess import CategoricalPreprocessor
 from src.components.numerical_preprocess import NumericalPreprocessor
 import joblib
 import os
 import yaml
 from src.logging import logging
+from src.utilities.fingerprint import artifact_version
 from sklearn.metrics import accuracy_score
 
 class PredictionPipeline:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, artifact_paths: Optional[Dict[str, str]] = None,
+                 version: Optional[str] = None):
         """
         Initialize the PredictionPipeline with pre-fitted preprocessors and model.
 
         Args:
             config_path (str): Path to the configuration file specifying model paths.
+            artifact_paths (Optional[Dict[str, str]]): Artifact paths keyed 'categorical_preprocessor',
+                'numerical_preprocessor' and 'model', e.g. a registry bundle. Defaults to the config paths.
+            version (Optional[str]): Version reported for the artifacts. Defaults to a hash of their file stats.
         """
         self.config_path = config_path
         try:
             with open(config_path, 'r') as file:
                 config = yaml.safe_load(file)
+            self.config = config
             # Use config to specify paths, with defaults
-            self.cat_preprocessor_path = config.get('categorical_preprocessor_path', 'models/categorical_preprocessor.joblib')
-            self.num_preprocessor_path = config.get('numerical_preprocessor_path', 'models/numerical_preprocessor.joblib')
-            self.model_path = config.get('model_path', 'models/churn_model.pkl')
+            if artifact_paths is None:
+                artifact_paths = {
+                    'categorical_preprocessor': config.get('categorical_preprocessor_path', 'models/categorical_preprocessor.joblib'),
+                    'numerical_preprocessor': config.get('numerical_preprocessor_path', 'models/numerical_preprocessor.joblib'),
+                    'model': config.get('model_path', 'models/churn_model.pkl'),
+                }
+            self.cat_preprocessor_path = artifact_paths['categorical_preprocessor']
+            self.num_preprocessor_path = artifact_paths['numerical_preprocessor']
+            self.model_path = artifact_paths['model']
+            self.artifact_paths = [self.cat_preprocessor_path, self.num_preprocessor_path, self.model_path]
+            self.version = version or artifact_version(self.artifact_paths)
             # Load pre-fitted preprocessors and model once
             self.cat_preprocessor = joblib.load(self.cat_preprocessor_path)
             logging.info(f"Categorical preprocessor loaded from {self.cat_preprocessor_path}")
@@ -32,6 +49,9 @@ class PredictionPipeline:
             logging.info(f"Numerical preprocessor loaded from {self.num_preprocessor_path}")
             self.model = joblib.load(self.model_path)
             logging.info(f"Model loaded from {self.model_path}")
+            self.compiled = None
+            if config.get('compiled_inference', True):
+                self.compile(config.get('parity_sample_path', 'src/test/mock_data.json'))
         except FileNotFoundError as e:
             logging.error(f"File not found during initialization: {e}")
             raise
@@ -39,6 +59,45 @@ class PredictionPipeline:
             logging.error(f"Error initializing PredictionPipeline: {e}", exc_info=True)
             raise
 
+    def compile(self, parity_sample_path: str, tolerance: float = 1e-9):
+        """
+        Compile the loaded preprocessors and model into a pandas-free scoring plan.
+
+        The plan is only enabled if it reproduces the pandas path on the parity sample;
+        otherwise predictions keep going through transform_predict.
+
+        Args:
+            parity_sample_path (str): JSON file of API-format customer records used for the parity check.
+            tolerance (float): Maximum allowed absolute difference in predicted probabilities.
+        """
+        try:
+            compiled = CompiledPredictionPipeline(self.cat_preprocessor, self.num_preprocessor, self.model)
+            with open(parity_sample_path, 'r') as file:
+                sample = pd.DataFrame(json.load(file)).rename(columns=COLUMN_RENAMES).dropna()
+            difference = compiled.max_abs_difference(
+                self.transform_predict(sample), sample.to_dict(orient='records'))
+            if difference is None or difference > tolerance:
+                logging.warning(f"Compiled plan failed parity check (max difference {difference}); using pandas path.")
+                return
+            self.compiled = compiled
+            logging.info(f"Compiled inference enabled (max parity difference {difference:.2e}).")
+        except Exception as e:
+            logging.warning(f"Could not compile prediction plan, using pandas path: {e}")
+
+    def predict_records(self, records: List[Dict[str, Any]]):
+        """
+        Predict churn scores for raw records keyed by the training column names.
+
+        Args:
+            records (List[Dict[str, Any]]): Input rows.
+
+        Returns:
+            numpy.ndarray: Predicted churn scores.
+        """
+        if self.compiled is not None:
+            return self.compiled.predict_proba(records)
+        return self.transform_predict(pd.DataFrame(records))
+
     def transform_predict(self, X: pd.DataFrame):
         """
         Transform input data and predict churn scores.
@@ -27,7 +27,8 @@ class TrainEvaluatePipeline:
                 ('num_preprocess', NumericalPreprocessor(config_path))
             ])
             self.data_balance_pipeline = ImbPipeline(steps=[
-                ('undersampler', Undersampler(k=5, percentile=20, eps=0.5, min_samples=2)),
+                ('undersampler', Undersampler(k=5, percentile=20, eps=0.5, min_samples=2,
+                                             scalable=True, n_jobs=-1)),
                 ('oversampler', SMOTE(sampling_strategy=sampling_strategy, random_state=42))
             ])
             self.training_pipeline = Pipeline(steps=[
@@ -62,7 +63,10 @@ class TrainEvaluatePipeline:
                 X_train_transformed, y_train)
             logging.info("Starting hyperparameter tuning...")
             tuner = HyperparameterTuner(config_path=self.config_path)
-            best_params = tuner.tune(X_train_resampled, y_train_resampled)
+            if tuner.cv_mode == 'pipeline':
+                best_params = tuner.tune_pipeline(X_train, y_train, self.preprocessor, self.data_balance_pipeline)
+            else:
+                best_params = tuner.tune(X_train_resampled, y_train_resampled)
             tuner.update_config(best_params)
             logging.info("Hyperparameter tuning completed.")
 
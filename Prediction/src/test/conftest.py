@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+PREDICTION_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PREDICTION_DIR not in sys.path:
+    sys.path.insert(0, PREDICTION_DIR)
+
+CONFIG_PATH = os.path.join(PREDICTION_DIR, 'config.yaml')
+
+CATEGORIES = {
+    'Gender': ['Male', 'Female'],
+    'Senior Citizen': ['Yes', 'No'],
+    'Partner': ['Yes', 'No'],
+    'Phone Service': ['Yes', 'No'],
+    'Internet Service': ['DSL', 'Fiber optic', 'No'],
+    'Online Security': ['Yes', 'No', 'No internet service'],
+    'Online Backup': ['Yes', 'No', 'No internet service'],
+    'Device Protection': ['Yes', 'No', 'No internet service'],
+    'Tech Support': ['Yes', 'No', 'No internet service'],
+    'Streaming TV': ['Yes', 'No', 'No internet service'],
+    'Streaming Movies': ['Yes', 'No', 'No internet service'],
+    'Contract': ['Month-to-month', 'One year', 'Two year'],
+    'Paperless Billing': ['Yes', 'No'],
+    'Payment Method': ['Electronic check', 'Mailed check', 'Bank transfer (automatic)', 'Credit card (automatic)'],
+}
+
+
+def make_customers(n: int, seed: int = 0) -> pd.DataFrame:
+    """Random customers with the selected training columns, in the training column order."""
+    rng = np.random.default_rng(seed)
+    data = {col: rng.choice(values, n) for col, values in CATEGORIES.items()}
+    data['Tenure Months'] = rng.integers(0, 73, n)
+    data['Monthly Charges'] = rng.uniform(18, 119, n).round(2)
+    data['Total Charges'] = (data['Monthly Charges'] * data['Tenure Months']).round(2)
+    data['CLTV'] = rng.integers(2000, 6500, n)
+    columns = ['Gender', 'Senior Citizen', 'Partner', 'Tenure Months', 'Phone Service', 'Internet Service',
+               'Online Security', 'Online Backup', 'Device Protection', 'Tech Support', 'Streaming TV',
+               'Streaming Movies', 'Contract', 'Paperless Billing', 'Payment Method', 'Monthly Charges',
+               'Total Charges', 'CLTV']
+    return pd.DataFrame(data)[columns]
+
+
+def fit_artifacts(config_path: str, save_dir: str, n: int = 500, seed: int = 1):
+    """Fit the categorical and numerical preprocessors and a logistic regression on random customers."""
+    from sklearn.linear_model import LogisticRegression
+    from src.components.category_preprocess import CategoricalPreprocessor
+    from src.components.numerical_preprocess import NumericalPreprocessor
+
+    X = make_customers(n)
+    y = pd.Series(np.random.default_rng(seed).integers(0, 2, len(X)), name='Churn Value')
+    cat_preprocessor = CategoricalPreprocessor(config_path, save_dir=save_dir).fit(X, y)
+    X_cat = cat_preprocessor.transform(X)
+    num_preprocessor = NumericalPreprocessor(config_path, save_dir=save_dir).fit(X_cat, y)
+    model = LogisticRegression(max_iter=1000, random_state=42).fit(num_preprocessor.transform(X_cat), y)
+    return cat_preprocessor, num_preprocessor, model
+
+
+def write_config(config_path: str, tmp_path, **overrides) -> str:
+    """Copy the config to tmp_path with top-level keys replaced by overrides and return its path."""
+    with open(config_path, 'r') as file:
+        config = yaml.safe_load(file)
+    config.update(overrides)
+    path = tmp_path / 'config.yaml'
+    with open(path, 'w') as file:
+        yaml.safe_dump(config, file)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def config_path() -> str:
+    return CONFIG_PATH
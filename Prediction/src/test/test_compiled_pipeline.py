@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import fit_artifacts, make_customers
+from src.pipeline.compiled_pipeline import CompiledPredictionPipeline
+from src.pipeline.prediction_pipeline import PredictionPipeline
+
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope='module')
+def pipelines(config_path, tmp_path_factory):
+    """A pandas PredictionPipeline and its compiled plan, fitted on random customers."""
+    cat_preprocessor, num_preprocessor, model = fit_artifacts(config_path, str(tmp_path_factory.mktemp('models')))
+
+    pipeline = PredictionPipeline.__new__(PredictionPipeline)
+    pipeline.cat_preprocessor = cat_preprocessor
+    pipeline.num_preprocessor = num_preprocessor
+    pipeline.model = model
+    return pipeline, CompiledPredictionPipeline(cat_preprocessor, num_preprocessor, model)
+
+
+def assert_parity(pipelines, records):
+    pipeline, compiled = pipelines
+    expected = pipeline.transform_predict(pd.DataFrame(records))
+    np.testing.assert_allclose(compiled.predict_proba(records), expected, rtol=0, atol=TOLERANCE)
+
+
+def test_parity_on_training_like_records(pipelines):
+    assert_parity(pipelines, make_customers(200, seed=2).to_dict(orient='records'))
+
+
+def test_parity_with_unseen_target_encoding_categories(pipelines):
+    records = make_customers(20, seed=3).to_dict(orient='records')
+    records[0]['Internet Service'] = 'Satellite'
+    records[1]['Contract'] = 'Three year'
+    records[2]['Payment Method'] = 'Cash'
+    assert_parity(pipelines, records)
+
+
+def test_parity_with_unmapped_binary_values(pipelines):
+    records = make_customers(20, seed=4).to_dict(orient='records')
+    records[0]['Senior Citizen'] = 'Unknown'
+    records[1]['Partner'] = 'maybe'
+    records[2]['Paperless Billing'] = ''
+    assert_parity(pipelines, records)
+
+
+@pytest.mark.parametrize('total_charges', [' ', '', 'n/a', None, float('nan')])
+def test_parity_with_blank_or_non_numeric_total_charges(pipelines, total_charges):
+    records = make_customers(20, seed=5).to_dict(orient='records')
+    records[0]['Total Charges'] = total_charges
+    assert_parity(pipelines, records)
+
+
+def test_export_round_trip_keeps_predictions(pipelines, tmp_path):
+    _, compiled = pipelines
+    records = make_customers(50, seed=6).to_dict(orient='records')
+    compiled.save(str(tmp_path))
+    loaded = CompiledPredictionPipeline.load(str(tmp_path))
+    np.testing.assert_allclose(loaded.predict_proba(records), compiled.predict_proba(records), rtol=0, atol=TOLERANCE)
@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+import yaml
+
+from conftest import make_customers, write_config
+from src.components.data_ingestion import DataLoader
+from src.components.feature_extraction import FeatureExtraction
+
+
+def selected_customers(n=20):
+    data = make_customers(n)
+    data['Churn Value'] = 0
+    return data
+
+
+def test_feature_extraction_skips_saving_without_selected_data_path(config_path, tmp_path):
+    extraction = FeatureExtraction(write_config(config_path, tmp_path, selected_data_path=None))
+    data = selected_customers()
+    assert extraction.transform(data).equals(data)
+    assert sorted(os.listdir(tmp_path)) == ['config.yaml']
+
+
+def test_feature_extraction_writes_parquet(config_path, tmp_path):
+    output = tmp_path / 'data' / 'selected.parquet'
+    extraction = FeatureExtraction(write_config(config_path, tmp_path, selected_data_path=str(output)))
+    extraction.transform(selected_customers())
+    assert len(pd.read_parquet(output)) == 20
+
+
+def test_feature_extraction_still_rejects_unknown_cols_to_drop(config_path, tmp_path):
+    with open(config_path, 'r') as file:
+        cols_to_drop = yaml.safe_load(file)['cols_to_drop']
+    extraction = FeatureExtraction(write_config(config_path, tmp_path, selected_data_path=None,
+                                                cols_to_drop=cols_to_drop + ['Not A Column']))
+    with pytest.raises(RuntimeError, match='Not A Column'):
+        extraction.transform(selected_customers())
+
+
+def test_snapshot_is_rebuilt_when_source_content_changes(config_path, tmp_path):
+    source = tmp_path / 'customers.xlsx'
+    snapshot = tmp_path / 'customers.parquet'
+    loader = DataLoader(write_config(config_path, tmp_path, data_path=str(source),
+                                     data_snapshot_path=str(snapshot), cols_to_select=[]))
+    data = selected_customers(10)
+    data.to_excel(source, index=False)
+    stat = os.stat(source)
+
+    assert len(loader.read()) == 10
+    assert loader._snapshot_is_current()
+
+    # Rewrite the contents but keep the old modification time.
+    data['Tenure Months'] = data['Tenure Months'] + 1
+    data.to_excel(source, index=False)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert not loader._snapshot_is_current()
+    assert loader.read()['Tenure Months'].tolist() == data['Tenure Months'].tolist()
+
+
+def test_integer_columns_with_missing_values_become_nullable(config_path):
+    loader = DataLoader(config_path)
+    data = loader._apply_dtypes(pd.DataFrame({'Tenure Months': [1, None, 3], 'CLTV': ['4000', '5000', '6000'],
+                                              'Zip Code': [90001, None, None]}))
+    assert str(data['Tenure Months'].dtype) == 'Int64'
+    assert data['Tenure Months'].isna().tolist() == [False, True, False]
+    assert str(data['CLTV'].dtype) == 'int64'
+    assert str(data['Zip Code'].dtype) == 'Int64'
+
+
+def test_read_postgres_requires_database_url(config_path, tmp_path, monkeypatch):
+    pytest.importorskip('psycopg2')
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    loader = DataLoader(write_config(config_path, tmp_path, data_source='postgres'))
+    with pytest.raises(RuntimeError, match='DATABASE_URL'):
+        loader.read_postgres()
@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from imblearn.over_sampling import RandomOverSampler
+from joblib import Memory
+from sklearn.datasets import make_classification
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from conftest import write_config
+from src.components import hyperparamer_tuning
+from src.components.hyperparamer_tuning import (HyperparameterTuner, make_folds, make_pipeline_folds,
+                                                stratified_order)
+from src.components.undersample import Undersampler
+from src.utilities import fingerprint
+
+PARAM_GRID = [
+    {'C': [0.01, 0.1, 1, 10, 100], 'penalty': ['l1', 'l2'], 'solver': ['liblinear']},
+    {'C': [0.01, 1, 100], 'penalty': ['l2'], 'solver': ['lbfgs']},
+]
+
+
+@pytest.fixture(scope='module')
+def training_data():
+    X, y = make_classification(n_samples=1500, n_features=8, weights=[0.75], random_state=0)
+    return pd.DataFrame(X), pd.Series(y)
+
+
+def cached_folds(cache_dir) -> int:
+    return sum('output.pkl' in files for _, _, files in os.walk(cache_dir))
+
+
+def make_tuner(config_path, tmp_path, method, param_grid=PARAM_GRID, **search):
+    search = {'cv': 3, 'method': method, 'factor': 3, 'min_resources': 100, 'n_iter': 4, 'n_jobs': 1,
+              'warm_start': True, **search}
+    return HyperparameterTuner(write_config(config_path, tmp_path, param_grid=param_grid,
+                                            hyperparameter_search=search))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_stratified_order_keeps_class_ratio_in_every_prefix(seed):
+    y = np.random.default_rng(seed).choice([0, 1], 1000, p=[0.8, 0.2])
+    order = stratified_order(y, np.random.default_rng(seed))
+    assert sorted(order) == list(range(len(y)))
+    n = np.arange(1, len(y) + 1)
+    positives = np.cumsum(y[order])
+    assert np.all(np.abs(positives - n * y.mean()) <= 1)
+
+
+def test_fold_subsamples_are_stratified(training_data):
+    X, y = training_data
+    for _, y_fit, _, _, order in make_folds(X, y, cv=3):
+        subsample = y_fit[order[:100]]
+        assert abs(subsample.mean() - y_fit.mean()) <= 0.01
+
+
+def test_halving_returns_a_candidate_from_the_grid(config_path, tmp_path, training_data):
+    tuner = make_tuner(config_path, tmp_path, 'halving')
+    best_params = tuner.tune(*training_data)
+    assert best_params in list(ParameterGrid(PARAM_GRID))
+    rounds = sorted({result['round'] for result in tuner.cv_results_})
+    assert len(rounds) > 1
+    # Each round scores fewer candidates on more rows, ending on all fit rows.
+    per_round = [[r for r in tuner.cv_results_ if r['round'] == i] for i in rounds]
+    assert [len(results) for results in per_round] == sorted((len(r) for r in per_round), reverse=True)
+    assert per_round[-1][0]['n_rows'] == 1000
+
+
+def test_random_search_returns_a_sampled_candidate(config_path, tmp_path, training_data):
+    tuner = make_tuner(config_path, tmp_path, 'random')
+    best_params = tuner.tune(*training_data)
+    sampled = [result['params'] for result in tuner.cv_results_]
+    assert len(sampled) == 4
+    assert best_params in sampled
+
+
+def test_invalid_candidates_are_skipped(config_path, tmp_path, training_data):
+    param_grid = {'C': [0.1, 1], 'penalty': ['l1', 'l2'], 'solver': ['lbfgs']}
+    tuner = make_tuner(config_path, tmp_path, 'grid', param_grid=param_grid)
+    best_params = tuner.tune(*training_data)
+    assert best_params['penalty'] == 'l2'
+    invalid = [result for result in tuner.cv_results_ if result['params']['penalty'] == 'l1']
+    assert invalid and all(np.isnan(result['mean_score']) for result in invalid)
+
+
+def test_warm_start_matches_cold_fits(config_path, tmp_path, training_data):
+    tuner = make_tuner(config_path, tmp_path, 'grid')
+    folds = make_folds(*training_data, cv=3)
+    candidates = list(ParameterGrid(PARAM_GRID[1]))
+    warm = tuner.evaluate(candidates, folds, len(folds[0][4]))
+    tuner.warm_start = False
+    cold = tuner.evaluate(candidates, folds, len(folds[0][4]))
+    np.testing.assert_allclose([r['mean_score'] for r in warm], [r['mean_score'] for r in cold], atol=0.01)
+
+
+def test_pipeline_folds_resample_only_the_training_rows(training_data, tmp_path):
+    X, y = training_data
+    memory = Memory(str(tmp_path), verbose=0)
+    folds = make_pipeline_folds(X, y, StandardScaler(), RandomOverSampler(random_state=0), cv=3,
+                                memory=memory, n_jobs=1)
+    splits = list(StratifiedKFold(n_splits=3).split(X, y))
+    for (X_fit, y_fit, X_val, y_val, order), (fit_idx, val_idx) in zip(folds, splits):
+        # Validation rows are scored as they are, scaled with statistics of the fold's training rows only.
+        np.testing.assert_array_equal(y_val, y.iloc[val_idx])
+        scaler = StandardScaler().fit(X.iloc[fit_idx])
+        np.testing.assert_allclose(X_val, scaler.transform(X.iloc[val_idx]))
+        assert len(y_fit) > len(fit_idx)
+        assert np.bincount(y_fit)[0] == np.bincount(y_fit)[1]
+        assert sorted(order) == list(range(len(y_fit)))
+
+    cached = make_pipeline_folds(X, y, StandardScaler(), RandomOverSampler(random_state=0), cv=3,
+                                 memory=memory, n_jobs=1)
+    for fold, cached_fold in zip(folds, cached):
+        for array, cached_array in zip(fold, cached_fold):
+            np.testing.assert_array_equal(array, cached_array)
+
+
+def test_tune_pipeline_returns_a_candidate_from_the_grid(config_path, tmp_path, training_data):
+    tuner = make_tuner(config_path, tmp_path, 'halving', cache_dir=str(tmp_path / 'cv_cache'), cv_mode='pipeline')
+    best_params = tuner.tune_pipeline(*training_data, StandardScaler(), RandomOverSampler(random_state=0))
+    assert best_params in list(ParameterGrid(PARAM_GRID))
+    assert os.listdir(tmp_path / 'cv_cache')
+
+
+def test_fold_cache_is_keyed_on_code_and_cache_version(training_data, tmp_path, monkeypatch):
+    X, y = training_data
+    memory = Memory(str(tmp_path), verbose=0)
+
+    def prepare(**kwargs):
+        make_pipeline_folds(X, y, StandardScaler(), RandomOverSampler(random_state=0), cv=3, memory=memory,
+                            n_jobs=1, **kwargs)
+        return cached_folds(tmp_path)
+
+    assert prepare() == 3
+    assert prepare() == 3
+    assert prepare(cache_version='2') == 6
+    monkeypatch.setattr(hyperparamer_tuning, 'code_version', lambda *estimators: 'changed')
+    assert prepare(cache_version='2') == 9
+
+
+def test_code_version_covers_the_modules_the_estimators_use(monkeypatch):
+    undersampler = Undersampler(k=5, percentile=20, eps=0.5, min_samples=2)
+    pipeline = Pipeline([('scaler', StandardScaler()), ('undersampler', undersampler)])
+    before = fingerprint.code_version(pipeline)
+    assert fingerprint.code_version(pipeline) == before
+
+    # The sampling itself lives in src.utilities.undersample, which the estimator's module imports.
+    content_hash = fingerprint.content_hash
+
+    def edited(paths):
+        changed = paths[0].endswith(os.path.join('utilities', 'undersample.py'))
+        return content_hash(paths) + ('-edited' if changed else '')
+
+    monkeypatch.setattr(fingerprint, 'content_hash', edited)
+    assert fingerprint.code_version(pipeline) != before
+
+def test_tune_pipeline_trims_the_fold_cache(config_path, tmp_path, training_data):
+    cache_dir = tmp_path / 'cv_cache'
+    tuner = make_tuner(config_path, tmp_path, 'grid', param_grid={'C': [1], 'solver': ['lbfgs']},
+                       cache_dir=str(cache_dir), cv_mode='pipeline', cache_bytes_limit=1)
+    tuner.tune_pipeline(*training_data, StandardScaler(), RandomOverSampler(random_state=0))
+    assert cached_folds(cache_dir) == 0
@@ -0,0 +1,93 @@
+import importlib
+import os
+import sys
+
+import joblib
+import pytest
+
+from conftest import PREDICTION_DIR, fit_artifacts, write_config
+
+pytest.importorskip('fastapi')
+from fastapi.testclient import TestClient  # noqa: E402
+
+CUSTOMER = {
+    'Gender': 'Male', 'Senior_Citizen': 'No', 'Partner': 'Yes', 'Tenure_Months': 5, 'Phone_Service': 'Yes',
+    'Internet_Service': 'DSL', 'Online_Security': 'No', 'Online_Backup': 'No', 'Device_Protection': 'No',
+    'Tech_Support': 'No', 'Streaming_TV': 'No', 'Streaming_Movies': 'No', 'Contract': 'Month-to-month',
+    'Paperless_Billing': 'Yes', 'Payment_Method': 'Electronic check', 'Monthly_Charges': 50.0,
+    'Total_Charges': 250.0, 'CLTV': 3000,
+}
+
+
+def write_service_config(config_path, root, seed=1):
+    """Fit and dump artifacts into root and write a service config pointing at them and a registry in root."""
+    paths = {}
+    for key, artifact in zip(('categorical_preprocessor_path', 'numerical_preprocessor_path', 'model_path'),
+                             fit_artifacts(config_path, str(root), seed=seed)):
+        paths[key] = str(root / f"{key}.joblib")
+        joblib.dump(artifact, paths[key])
+    write_config(config_path, root, model_registry={'path': str(root / 'registry'), 'poll_interval': 5},
+                 parity_sample_path=os.path.join(PREDICTION_DIR, 'src', 'test', 'mock_data.json'), **paths)
+
+
+def start_service(monkeypatch, root):
+    """Import the service afresh from root, which runs its startup publish against root's config."""
+    monkeypatch.chdir(root)
+    sys.modules.pop('src.api.service', None)
+    return importlib.import_module('src.api.service')
+
+
+@pytest.fixture(scope='module')
+def client(config_path, tmp_path_factory):
+    """The scoring service, started in a scratch directory with freshly fitted artifacts."""
+    root = tmp_path_factory.mktemp('service')
+    write_service_config(config_path, root)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        yield TestClient(start_service(monkeypatch, root).app)
+    sys.modules.pop('src.api.service', None)
+
+
+def test_batch_scores_valid_customers_and_reports_invalid_ones(client):
+    customers = [
+        {**CUSTOMER, 'CustomerID': 'valid'},
+        {**CUSTOMER, 'CustomerID': 'no-charges', 'Total_Charges': None},
+        {**CUSTOMER, 'CustomerID': 'unknown-gender', 'Gender': 'Unknown'},
+        {**CUSTOMER, 'CustomerID': 'also-valid', 'Tenure_Months': 40},
+        CUSTOMER,
+    ]
+    response = client.post('/predict_churn_batch', json={'customers': customers})
+    assert response.status_code == 200
+    body = response.json()
+    assert sorted(body['churn_scores']) == ['also-valid', 'valid']
+    assert sorted(body['errors']) == ['#4', 'no-charges', 'unknown-gender']
+    assert 'Total_Charges' in body['errors']['no-charges']
+    assert 'Gender' in body['errors']['unknown-gender']
+
+
+def test_batch_scores_match_single_requests(client):
+    batch = client.post('/predict_churn_batch', json={'customers': [{**CUSTOMER, 'CustomerID': 'a'}]}).json()
+    single = client.post('/predict_churn', json=CUSTOMER).json()
+    assert batch['errors'] == {}
+    assert batch['churn_scores']['a'] == pytest.approx(single['churn_score'])
+
+
+def test_restart_serves_retrained_artifacts_and_keeps_rollbacks(config_path, tmp_path, monkeypatch):
+    write_service_config(config_path, tmp_path, seed=1)
+    first = start_service(monkeypatch, tmp_path).prediction_pipeline.version
+
+    # Unchanged artifacts are not published again.
+    assert start_service(monkeypatch, tmp_path).prediction_pipeline.version == first
+
+    # Retraining overwrites the configured artifacts; the next start publishes and serves them.
+    write_service_config(config_path, tmp_path, seed=2)
+    service = start_service(monkeypatch, tmp_path)
+    retrained = service.prediction_pipeline.version
+    assert retrained != first
+    assert service.registry.versions() == sorted([first, retrained])
+
+    # A rollback is kept across restarts while the artifacts stay the same.
+    service.registry.rollback()
+    service = start_service(monkeypatch, tmp_path)
+    assert service.prediction_pipeline.version == first
+    assert len(service.registry.versions()) == 2
+    sys.modules.pop('src.api.service', None)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import DBSCAN
+
+from src.utilities.undersample import (chunked_dbscan, chunked_mean_knn_distance, first_members,
+                                       undersample_majority)
+
+
+def random_points(seed, n=600, dims=3):
+    """Blobs plus uniform background, so the data has clusters, border points and noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-5, 5, (6, dims))
+    blobs = centers[rng.integers(0, len(centers), n - n // 4)] + rng.normal(scale=0.3, size=(n - n // 4, dims))
+    background = rng.uniform(-6, 6, (n // 4, dims))
+    return np.vstack([blobs, background])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('chunk_size', [37, 10000])
+def test_chunked_dbscan_matches_sklearn(seed, chunk_size):
+    X = random_points(seed)
+    expected = DBSCAN(eps=0.4, min_samples=4).fit_predict(X)
+    labels = chunked_dbscan(X, eps=0.4, min_samples=4, chunk_size=chunk_size)
+
+    np.testing.assert_array_equal(labels == -1, expected == -1)
+    # Same partition: every sklearn cluster maps to exactly one chunked cluster and back.
+    pairs = set(zip(expected[expected != -1], labels[labels != -1]))
+    assert len(pairs) == len(set(expected) - {-1}) == len(set(labels) - {-1})
+    np.testing.assert_array_equal(first_members(labels), first_members(expected))
+
+
+def test_chunked_dbscan_without_core_points_is_all_noise():
+    X = np.arange(10, dtype=np.float64).reshape(-1, 1) * 10
+    np.testing.assert_array_equal(chunked_dbscan(X, eps=1, min_samples=2), np.full(10, -1))
+
+
+def test_chunked_mean_knn_distance_matches_full_query():
+    X = random_points(3, n=200)
+    expected = chunked_mean_knn_distance(X, k=5, chunk_size=len(X))
+    np.testing.assert_allclose(chunked_mean_knn_distance(X, k=5, chunk_size=17), expected)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_scalable_undersampling_keeps_the_same_rows(seed):
+    X = pd.DataFrame(random_points(seed))
+    y = pd.Series(np.zeros(len(X), dtype=int))
+    exact, y_exact = undersample_majority(X, y, eps=0.4, min_samples=3)
+    scalable, y_scalable = undersample_majority(X, y, eps=0.4, min_samples=3, scalable=True, chunk_size=50)
+    assert exact.index.equals(scalable.index)
+    assert y_exact.index.equals(y_scalable.index)
+    assert len(exact) < len(X)
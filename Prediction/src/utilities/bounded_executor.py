@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a BoundedExecutor already holds as many tasks as it may queue."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking scoring work with a hard cap on queued tasks.
+
+    At most max_concurrency tasks run at once and at most max_queue more wait for a thread;
+    anything beyond that is rejected immediately with ExecutorSaturated, so overload turns
+    into fast refusals instead of an ever growing backlog. Must be used from one event loop.
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 32):
+        """
+        Args:
+            max_concurrency (int): Worker threads.
+            max_queue (int): Tasks allowed to wait for a free thread.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_pending = max_concurrency + max_queue
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='scoring')
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Run func(*args) on the pool and wait for its result.
+
+        Raises:
+            ExecutorSaturated: If max_concurrency + max_queue tasks are already pending.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self.pending} scoring tasks pending")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,103 @@
+import hashlib
+import inspect
+import os
+import sys
+from typing import Any, Iterable, Optional
+
+PROJECT_PACKAGE = 'src'
+
+
+def artifact_version(paths: Iterable[str]) -> str:
+    """
+    Build a version string for model artifacts from their size and modification time.
+
+    Cheap enough to call on every startup; use content_hash where a rewrite with identical
+    size and timestamp must still be detected.
+
+    Args:
+        paths (Iterable[str]): Paths of the model and preprocessor files.
+
+    Returns:
+        str: Short hash that changes whenever any artifact is replaced or rewritten.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except FileNotFoundError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:16]
+
+
+def content_hash(paths: Iterable[str], chunk_size: int = 1 << 20) -> str:
+    """
+    Hash the contents of files, read chunk_size bytes at a time.
+
+    Args:
+        paths (Iterable[str]): Files to hash, in order.
+        chunk_size (int): Bytes read per chunk.
+
+    Returns:
+        str: Short SHA-256 hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+def _module_name(obj: Any) -> Optional[str]:
+    name = obj.__name__ if inspect.ismodule(obj) else getattr(obj, '__module__', None)
+    return name if isinstance(name, str) else None
+
+
+def code_version(*estimators: Any) -> str:
+    """
+    Hash the code that fitted estimators' results depend on.
+
+    Covers the source of every project module defining one of the estimators or their nested
+    parameters, plus the project modules those import, and the versions of third-party packages
+    providing the other estimators. Parameters alone do not change when that code does, so
+    memoized fits keyed on parameters must also be keyed on this.
+
+    Args:
+        estimators: Estimators or pipelines; nested estimators are found through get_params(deep=True).
+
+    Returns:
+        str: Short hash that changes whenever the code behind the estimators changes.
+    """
+    objects = []
+    for estimator in estimators:
+        objects.append(estimator)
+        if hasattr(estimator, 'get_params'):
+            objects.extend(estimator.get_params(deep=True).values())
+
+    pending, packages = set(), set()
+    for obj in objects:
+        name = _module_name(obj)
+        if name is None:
+            continue
+        if name.split('.')[0] == PROJECT_PACKAGE:
+            pending.add(name)
+        elif name.split('.')[0] != 'builtins':
+            packages.add(name.split('.')[0])
+
+    modules = set()
+    while pending:
+        name = pending.pop()
+        modules.add(name)
+        for value in vars(sys.modules[name]).values():
+            dependency = _module_name(value)
+            if dependency and dependency.split('.')[0] == PROJECT_PACKAGE and dependency not in modules:
+                pending.add(dependency)
+
+    digest = hashlib.sha256()
+    for package in sorted(packages):
+        digest.update(f"{package}:{getattr(sys.modules.get(package), '__version__', '')};".encode())
+    for name in sorted(modules):
+        digest.update(f"{name}:{content_hash([sys.modules[name].__file__])};".encode())
+    return digest.hexdigest()[:16]
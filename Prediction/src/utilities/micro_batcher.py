@@ -0,0 +1,121 @@
+import asyncio
+import bisect
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple, Type
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds observations <= bounds[i], the last bucket the rest."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def stats(self) -> Dict[str, Any]:
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": round(self.sum / self.total, 4) if self.total else None,
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-record scoring calls into one vectorized call.
+
+    submit() parks each record until either max_rows records are waiting or max_wait_ms has
+    passed since the first of them arrived, then scores the whole group with one call to
+    score_batch and hands every caller its own row of the result. Must be used from one event loop.
+    """
+
+    def __init__(self, score_batch: Callable[[List[Any]], Awaitable[Tuple[List[Any], Any]]],
+                 max_rows: int = 64, max_wait_ms: float = 2.0,
+                 shared_errors: Tuple[Type[BaseException], ...] = ()):
+        """
+        Args:
+            score_batch: Coroutine function scoring a list of records, returning (scores, extra);
+                extra (e.g. the model version) is passed to every caller alongside its score.
+            max_rows (int): Batch size that triggers an immediate flush.
+            max_wait_ms (float): Longest time the first record of a batch waits for company.
+            shared_errors: Exception types that concern the batch as a whole, e.g. overload; they are
+                passed to every caller. Other errors are assumed to come from an invalid record, so
+                the batch is retried record by record and only the failing callers get an error.
+        """
+        self.score_batch = score_batch
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.shared_errors = shared_errors
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_ms = Histogram([0.5, 1, 2, 5, 10, 25, 50, 100])
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, record: Any) -> Tuple[Any, Any]:
+        """Score one record as part of the next batch, returning (score, extra)."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future, time.perf_counter()))
+        if len(self._pending) >= self.max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            # The loop only keeps weak references to tasks.
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        started = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000)
+        try:
+            scores, extra = await self.score_batch([record for record, _, _ in batch])
+            results = [(score, extra) for score in scores]
+        except self.shared_errors as e:
+            results = [e] * len(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                results = [e]
+            else:
+                # One invalid record must not fail its neighbours: retry each on its own.
+                results = [await self._run_single(record) for record, _, _ in batch]
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _run_single(self, record: Any):
+        try:
+            scores, extra = await self.score_batch([record])
+            return scores[0], extra
+        except Exception as e:
+            return e
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_rows": self.max_rows,
+            "max_wait_ms": self.max_wait * 1000,
+            "waiting": len(self._pending),
+            "batch_size": self.batch_sizes.stats(),
+            "queue_wait_ms": self.queue_wait_ms.stats(),
+        }
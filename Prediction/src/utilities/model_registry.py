@@ -0,0 +1,235 @@
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from src.logging import logging
+
+# Bundle file names, keyed by the role PredictionPipeline loads them for.
+BUNDLE_FILES = {
+    'categorical_preprocessor': 'categorical_preprocessor.joblib',
+    'numerical_preprocessor': 'numerical_preprocessor.joblib',
+    'model': 'churn_model.pkl',
+}
+
+
+class ModelRegistry:
+    """
+    Directory of versioned model bundles with a JSON manifest naming the active one.
+
+    Layout::
+
+        <root>/manifest.json
+        <root>/<version>/categorical_preprocessor.joblib
+        <root>/<version>/numerical_preprocessor.joblib
+        <root>/<version>/churn_model.pkl
+        <root>/<version>/compiled/          (optional memory-mappable export, see CompiledPredictionPipeline.save)
+
+    Bundles are immutable once published. The manifest records every bundle, the active
+    version and the stack of previously active versions used by rollback(). Manifest
+    updates hold an exclusive file lock and are written atomically, so several service
+    workers can share one registry.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): Registry directory, created if missing.
+        """
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.lock_path = os.path.join(root, '.lock')
+        os.makedirs(root, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_path):
+            return {'active': None, 'history': [], 'bundles': {}}
+        with open(self.manifest_path, 'r') as file:
+            return json.load(file)
+
+    def _write(self, manifest: Dict[str, Any]):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def manifest(self) -> Dict[str, Any]:
+        """Return a snapshot of the manifest."""
+        return self._read()
+
+    def active_version(self) -> Optional[str]:
+        return self._read()['active']
+
+    def bundle_paths(self, version: str) -> Dict[str, str]:
+        """
+        Return the artifact paths of a published bundle.
+
+        Raises:
+            KeyError: If the version is not in the registry.
+        """
+        if version not in self._read()['bundles']:
+            raise KeyError(f"Unknown model version: {version}")
+        return {role: os.path.join(self.root, version, name) for role, name in BUNDLE_FILES.items()}
+
+    def compiled_path(self, version: str) -> Optional[str]:
+        """Return the directory of the bundle's compiled export, or None if it has none."""
+        path = os.path.join(self.root, version, 'compiled')
+        return path if os.path.isfile(os.path.join(path, 'schema.json')) else None
+
+    def publish(self, artifact_paths: Dict[str, str], metadata: Optional[Dict[str, Any]] = None,
+                activate: bool = False, config_path: Optional[str] = None) -> str:
+        """
+        Copy a set of artifacts into a new immutable bundle.
+
+        Publishing files identical to an existing bundle returns that bundle's version.
+
+        Args:
+            artifact_paths (Dict[str, str]): Source paths keyed like BUNDLE_FILES.
+            metadata (Optional[Dict[str, Any]]): Free-form details stored in the manifest, e.g. metrics.
+            activate (bool): Make the bundle the active version.
+            config_path (Optional[str]): Service config; when given, the bundle also gets a compiled
+                export if the compiled plan passes its parity check.
+
+        Returns:
+            str: The bundle version.
+        """
+        digest = hashlib.sha256()
+        for role in BUNDLE_FILES:
+            with open(artifact_paths[role], 'rb') as file:
+                for chunk in iter(lambda: file.read(1 << 20), b''):
+                    digest.update(chunk)
+        content_hash = digest.hexdigest()
+
+        with self._locked():
+            manifest = self._read()
+            version = next((v for v, bundle in manifest['bundles'].items()
+                            if bundle['sha256'] == content_hash), None)
+            if version is None:
+                version = f"{time.strftime('%Y%m%d%H%M%S')}-{content_hash[:8]}"
+                staging = os.path.join(self.root, f".staging-{version}")
+                os.makedirs(staging, exist_ok=True)
+                for role, name in BUNDLE_FILES.items():
+                    shutil.copy2(artifact_paths[role], os.path.join(staging, name))
+                compiled = config_path is not None and self._export_compiled(staging, config_path)
+                os.replace(staging, os.path.join(self.root, version))
+                manifest['bundles'][version] = {
+                    'created_at': time.time(),
+                    'sha256': content_hash,
+                    'compiled': compiled,
+                    'metadata': metadata or {},
+                }
+                logging.info(f"Published model bundle {version}")
+            if activate or manifest['active'] is None:
+                self._set_active(manifest, version)
+            self._write(manifest)
+        return version
+
+    @staticmethod
+    def _export_compiled(bundle_dir: str, config_path: str) -> bool:
+        from src.pipeline.prediction_pipeline import PredictionPipeline
+
+        paths = {role: os.path.join(bundle_dir, name) for role, name in BUNDLE_FILES.items()}
+        try:
+            pipeline = PredictionPipeline(config_path, artifact_paths=paths)
+        except Exception as e:
+            logging.warning(f"Could not load bundle for compiled export: {e}")
+            return False
+        if pipeline.compiled is None:
+            logging.warning("Compiled plan unavailable for this bundle; it will be served from the joblib artifacts.")
+            return False
+        pipeline.compiled.save(os.path.join(bundle_dir, 'compiled'))
+        return True
+
+    @staticmethod
+    def _set_active(manifest: Dict[str, Any], version: str):
+        if manifest['active'] != version:
+            if manifest['active'] is not None:
+                manifest['history'].append(manifest['active'])
+            manifest['active'] = version
+
+    def activate(self, version: str):
+        """
+        Make a published bundle the active version.
+
+        Raises:
+            KeyError: If the version is not in the registry.
+        """
+        with self._locked():
+            manifest = self._read()
+            if version not in manifest['bundles']:
+                raise KeyError(f"Unknown model version: {version}")
+            self._set_active(manifest, version)
+            self._write(manifest)
+        logging.info(f"Activated model bundle {version}")
+
+    def rollback_target(self) -> Optional[str]:
+        """Return the version rollback() would activate, or None if there is nothing to roll back to."""
+        history = self._read()['history']
+        return history[-1] if history else None
+
+    def rollback(self, expected: Optional[str] = None) -> str:
+        """
+        Re-activate the previously active bundle.
+
+        Args:
+            expected (Optional[str]): Fail instead of rolling back if the target changed meanwhile.
+
+        Returns:
+            str: The version that is now active.
+
+        Raises:
+            ValueError: If there is no previous version, or it is not the expected one.
+        """
+        with self._locked():
+            manifest = self._read()
+            if not manifest['history']:
+                raise ValueError("No previous model version to roll back to")
+            if expected is not None and manifest['history'][-1] != expected:
+                raise ValueError("Model registry changed during rollback; retry")
+            manifest['active'] = manifest['history'].pop()
+            self._write(manifest)
+        logging.info(f"Rolled back to model bundle {manifest['active']}")
+        return manifest['active']
+
+    def versions(self) -> List[str]:
+        return sorted(self._read()['bundles'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manage the churn model registry.")
+    parser.add_argument('--root', default='models/registry')
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help="Publish a directory holding the three artifacts.")
+    publish.add_argument('directory')
+    publish.add_argument('--activate', action='store_true')
+    publish.add_argument('--config', default='config.yaml', help="Service config used for the compiled export.")
+    activate = commands.add_parser('activate')
+    activate.add_argument('version')
+    commands.add_parser('rollback')
+    commands.add_parser('list')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'publish':
+        paths = {role: os.path.join(args.directory, name) for role, name in BUNDLE_FILES.items()}
+        print(registry.publish(paths, metadata={'source': args.directory}, activate=args.activate,
+                               config_path=args.config))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+    elif args.command == 'rollback':
+        print(registry.rollback())
+    print(json.dumps(registry.manifest(), indent=2))
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 6)
+    return value
+
+
+class ScoreCache:
+    """Thread-safe LRU cache with TTL for churn scores keyed by a customer feature fingerprint."""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): Maximum number of cached scores before least recently used entries are evicted.
+            ttl_seconds (float): Lifetime of an entry in seconds.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def fingerprint(record: Dict[str, Any], version: str) -> str:
+        """
+        Hash the normalized feature values of a record together with the artifact version.
+
+        Args:
+            record (Dict[str, Any]): Customer features.
+            version (str): Model artifact version.
+
+        Returns:
+            str: Cache key.
+        """
+        normalized = {key: _normalize(value) for key, value in record.items()}
+        payload = json.dumps(normalized, sort_keys=True, default=str)
+        return hashlib.sha256(f"{version}|{payload}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached score for key, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        """Store a score, evicting the least recently used entries when full."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached score, e.g. after a new model version went live."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
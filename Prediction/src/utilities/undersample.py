@@ -1,9 +1,108 @@
 import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 from sklearn.cluster import DBSCAN
 from sklearn.neighbors import NearestNeighbors
 
 
-def undersample_majority(majority_class, y_majority, k=5, percentile=20, eps=0.5, min_samples=2):
+def first_members(labels):
+    """
+    Return the position of the first member of every cluster, ignoring noise (-1).
+
+    Parameters:
+    - labels: np.ndarray of cluster labels, one per point.
+
+    Returns:
+    - np.ndarray of positions, ordered by label.
+    """
+    clustered = np.flatnonzero(labels != -1)
+    _, first = np.unique(labels[clustered], return_index=True)
+    return clustered[first]
+
+
+def chunked_mean_knn_distance(X, k=5, algorithm='kd_tree', n_jobs=None, chunk_size=10000):
+    """
+    Average distance of every point to its k nearest neighbors (itself included), queried in chunks.
+
+    Only chunk_size x k distances are held at a time instead of the full n x k matrices.
+    """
+    nn = NearestNeighbors(n_neighbors=k, algorithm=algorithm, n_jobs=n_jobs).fit(X)
+    avg_distances = np.empty(len(X))
+    for start in range(0, len(X), chunk_size):
+        distances, _ = nn.kneighbors(X[start:start + chunk_size])
+        avg_distances[start:start + chunk_size] = distances.mean(axis=1)
+    return avg_distances
+
+
+def _radius_neighbors(nn, X, rows):
+    """Return (query rows repeated per neighbor, neighbor indices, neighbor counts) for the given rows."""
+    neighborhoods = nn.radius_neighbors(X[rows], return_distance=False)
+    lengths = np.fromiter((len(n) for n in neighborhoods), dtype=np.int64, count=len(rows))
+    neighbors = np.concatenate(neighborhoods) if len(rows) else np.empty(0, dtype=np.int64)
+    return np.repeat(rows, lengths), neighbors, lengths
+
+
+def chunked_dbscan(X, eps=0.5, min_samples=2, algorithm='kd_tree', n_jobs=None, chunk_size=10000):
+    """
+    DBSCAN clustering computed from chunked radius queries, without storing every neighborhood.
+
+    Core points are found from neighbor counts, clusters are the connected components of the
+    core points' eps-graph (merged chunk by chunk), and each border point joins the cluster
+    sklearn's DBSCAN would give it: the adjacent cluster discovered first, i.e. the one with
+    the lowest core point index. Clusters are labelled by that lowest core index rather than
+    0..n_clusters-1, so cluster membership (and first members) match sklearn.cluster.DBSCAN.
+
+    Parameters:
+    - X: np.ndarray of points.
+    - eps, min_samples: as for sklearn.cluster.DBSCAN.
+    - algorithm: neighbor index, 'kd_tree' or 'ball_tree'.
+    - n_jobs: parallel jobs for neighbor queries.
+    - chunk_size: points queried at once; peak memory grows with chunk_size x neighbors per point.
+
+    Returns:
+    - np.ndarray of cluster labels, -1 for noise.
+    """
+    n = len(X)
+    nn = NearestNeighbors(radius=eps, algorithm=algorithm, n_jobs=n_jobs).fit(X)
+
+    counts = np.empty(n, dtype=np.int64)
+    for start in range(0, n, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, n))
+        _, _, counts[rows] = _radius_neighbors(nn, X, rows)
+    core = counts >= min_samples
+    core_idx = np.flatnonzero(core)
+
+    # Union the core-core edges chunk by chunk; root[i] is the component of point i so far.
+    root = np.arange(n)
+    for start in range(0, len(core_idx), chunk_size):
+        sources, neighbors, _ = _radius_neighbors(nn, X, core_idx[start:start + chunk_size])
+        keep = core[neighbors]
+        edges = coo_matrix((np.ones(keep.sum(), dtype=np.int8), (root[sources[keep]], root[neighbors[keep]])),
+                           shape=(n, n))
+        _, components = connected_components(edges, directed=False)
+        root = components[root]
+
+    labels = np.full(n, -1)
+    if not len(core_idx):
+        return labels
+    lowest_core = np.full(n, n)
+    np.minimum.at(lowest_core, root[core_idx], core_idx)
+    labels[core_idx] = lowest_core[root[core_idx]]
+
+    non_core = np.flatnonzero(~core)
+    for start in range(0, len(non_core), chunk_size):
+        sources, neighbors, _ = _radius_neighbors(nn, X, non_core[start:start + chunk_size])
+        keep = core[neighbors]
+        if keep.any():
+            border = np.full(n, n)
+            np.minimum.at(border, sources[keep], labels[neighbors[keep]])
+            assigned = np.unique(sources[keep])
+            labels[assigned] = border[assigned]
+    return labels
+
+
+def undersample_majority(majority_class, y_majority, k=5, percentile=20, eps=0.5, min_samples=2,
+                         scalable=False, algorithm='kd_tree', n_jobs=None, chunk_size=10000):
     """
     Undersamples the majority class by keeping sparse points (with high average k-NN distances)
     and one representative from each dense cluster.
@@ -15,43 +114,47 @@ def undersample_majority(majority_class, y_majority, k=5, percentile=20, eps=0.5
     - percentile: float, percentile threshold to differentiate sparse and dense points (default=20).
     - eps: float, DBSCAN eps parameter for clustering dense points (default=0.5).
     - min_samples: int, DBSCAN min_samples parameter (default=2).
+    - scalable: bool, use a tree index with chunked queries and chunked_dbscan so memory stays
+      bounded on large datasets instead of exact all-pairs k-NN and DBSCAN (default=False).
+    - algorithm: str, tree index of the scalable mode, 'kd_tree' or 'ball_tree' (default='kd_tree').
+    - n_jobs: int, parallel jobs for the scalable mode's neighbor queries (default=None).
+    - chunk_size: int, points queried at once in the scalable mode (default=10000).
 
     Returns:
     - X_majority_reduced: pd.DataFrame, reduced majority class features.
     - y_majority_reduced: pd.Series, reduced majority class labels.
     """
 
-    nn = NearestNeighbors(n_neighbors=k)
-    nn.fit(majority_class)
-    distances, indices = nn.kneighbors(majority_class)
-    avg_distances = np.mean(distances, axis=1)
+    if scalable:
+        X = np.ascontiguousarray(majority_class.to_numpy(dtype=np.float64))
+        avg_distances = chunked_mean_knn_distance(X, k, algorithm, n_jobs, chunk_size)
+    else:
+        nn = NearestNeighbors(n_neighbors=k)
+        nn.fit(majority_class)
+        distances, indices = nn.kneighbors(majority_class)
+        avg_distances = np.mean(distances, axis=1)
 
     threshold = np.percentile(avg_distances, percentile)
 
     sparse_idx = np.where(avg_distances > threshold)[0]
     dense_idx = np.where(avg_distances <= threshold)[0]
 
-    dense_data = majority_class.iloc[dense_idx]
-    dbscan = DBSCAN(eps=eps, min_samples=min_samples)
-    cluster_labels = dbscan.fit_predict(dense_data)
-
-    dense_representatives = []
-    unique_labels = np.unique(cluster_labels)
-
-    for label in unique_labels:
-        if label == -1:
-            continue
-        cluster_local_indices = np.where(cluster_labels == label)[0]
-        representative_original_idx = dense_idx[cluster_local_indices[0]]
-        dense_representatives.append(representative_original_idx)
+    if scalable:
+        cluster_labels = chunked_dbscan(X[dense_idx], eps, min_samples, algorithm, n_jobs, chunk_size)
+    else:
+        dense_data = majority_class.iloc[dense_idx]
+        dbscan = DBSCAN(eps=eps, min_samples=min_samples)
+        cluster_labels = dbscan.fit_predict(dense_data)
 
+    dense_representatives = dense_idx[first_members(cluster_labels)]
     noise_indices = dense_idx[cluster_labels == -1]
 
     final_keep_idx = np.concatenate(
-        [sparse_idx, np.array(dense_representatives), noise_indices])
+        [sparse_idx, dense_representatives, noise_indices])
     final_keep_idx = np.unique(final_keep_idx)
 
     X_majority_reduced = majority_class.iloc[final_keep_idx]
     y_majority_reduced = y_majority.iloc[final_keep_idx]
 
     return X_majority_reduced, y_majority_reduced
+
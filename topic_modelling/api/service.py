@@ -1,9 +1,17 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from nmf import TextPreprocessor, TopicModelingPipeline
+from assignment import TopicAssigner
+from jobs import init_worker, load_results, run_job
 from logger import logging
 app = FastAPI(title="Top2Vec Topic Modeling API")
 
@@ -18,6 +26,12 @@ app.add_middleware(
 
 class DocumentInput(BaseModel):
     documents: List[str]
+    last_message_id: Optional[int] = None
+    full_refit: bool = False
+
+
+class AssignInput(BaseModel):
+    documents: List[str]
 
 
 class Topic(BaseModel):
@@ -25,54 +39,196 @@ class Topic(BaseModel):
     topic_name: str
     description: str
     frequency: int
+    top_words: List[str] = []
+    representative_documents: List[str] = []
 
 
 class Results(BaseModel):
     topics: List[Topic]
 
 
+SETTINGS = {
+    "model_path": os.getenv("TOPIC_MODEL_PATH", "artifacts/topic_model.joblib"),
+    "phrases_path": os.getenv("TOPIC_PHRASES_PATH", "artifacts/phrases"),
+    "results_path": os.getenv("TOPIC_RESULTS_PATH", "artifacts/topics.json"),
+    "cache_path": os.getenv("PREPROCESS_CACHE_PATH", "artifacts/preprocess_cache.sqlite"),
+    "cache_max_entries": int(os.getenv("PREPROCESS_CACHE_MAX_ENTRIES", "200000")),
+    "lemmatize_batch_size": int(os.getenv("LEMMATIZE_BATCH_SIZE", "256")),
+    "lemmatize_n_process": int(os.getenv("LEMMATIZE_N_PROCESS", "1")),
+    "n_topics": 5,
+}
+MAX_TRACKED_JOBS = int(os.getenv("TOPIC_MAX_TRACKED_JOBS", "100"))
+
+# Latest completed result; jobs replace it only with a higher model version.
 results = None
-preprocessor = TextPreprocessor()
-pipeline = TopicModelingPipeline(n_topics=5)
+jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+executor: Optional[ProcessPoolExecutor] = None
+manager = None
+progress = None
+assigner = TopicAssigner(SETTINGS, batch_size=int(os.getenv("TOPIC_ASSIGN_BATCH_SIZE", "512")))
+
+
+@app.on_event("startup")
+async def startup():
+    global results, executor, manager, progress
+    results = load_results(SETTINGS["results_path"])
+    # A single worker owns the phrase, vectorizer and NMF state, so jobs are applied one at a
+    # time in submission order and never overwrite each other's updates.
+    context = multiprocessing.get_context("spawn")
+    manager = context.Manager()
+    progress = manager.dict()
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                   initializer=init_worker, initargs=(SETTINGS,))
+    if results is not None:
+        try:
+            await asyncio.to_thread(assigner.load, results["version"])
+        except Exception as e:
+            logging.info(f"Could not preload the topic assigner: {str(e)}")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    executor.shutdown(wait=True, cancel_futures=True)
+    manager.shutdown()
+
+
+def _track_job(job_id: str, record: Dict[str, Any]):
+    jobs[job_id] = record
+    while len(jobs) > MAX_TRACKED_JOBS:
+        oldest_id = next(iter(jobs))
+        if jobs[oldest_id]["status"] in ("queued", "running"):
+            break
+        jobs.pop(oldest_id)
+        progress.pop(oldest_id, None)
+
+
+def _job_finished(job_id: str, future):
+    global results
+    job = jobs.get(job_id)
+    if job is None:
+        return
+    job["finished_at"] = time.time()
+    if future.cancelled():
+        job["status"] = "cancelled"
+        return
+    error = future.exception()
+    if error is not None:
+        job["status"] = "failed"
+        job["error"] = str(error)
+        return
+    result = future.result()
+    job["status"] = "succeeded"
+    job["version"] = result["version"]
+    job["mode"] = result["mode"]
+    if results is None or result["version"] > results["version"]:
+        results = result
+
+
+@app.post("/process", status_code=202)
+async def process_documents(input_data: DocumentInput):
+    """
+    Queue a topic modelling job and return its id immediately.
+
+    The first job, or any job with full_refit, fits phrases, vectorizer and NMF from scratch on
+    the given documents. Later jobs only carry documents newer than the high-water mark and
+    update the persisted model incrementally. Poll /jobs/{job_id} for progress.
+    """
+    documents = input_data.documents
+    if not documents:
+        logging.info("No documents provided")
+        raise HTTPException(
+            status_code=400, detail="No documents provided")
 
+    if any(not doc.strip() for doc in documents):
+        logging.info("Some documents are empty")
+        raise HTTPException(
+            status_code=400, detail="Some documents are empty")
+
+    job_id = uuid.uuid4().hex
+    _track_job(job_id, {
+        "job_id": job_id,
+        "status": "queued",
+        "documents": len(documents),
+        "last_message_id": input_data.last_message_id,
+        "full_refit": input_data.full_refit,
+        "submitted_at": time.time(),
+        "finished_at": None,
+    })
+    try:
+        future = asyncio.get_running_loop().run_in_executor(
+            executor, run_job, job_id, documents, input_data.last_message_id, input_data.full_refit, progress)
+    except Exception as e:
+        jobs.pop(job_id, None)
+        logging.info(f"Error submitting topic job: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error submitting topic job: {str(e)}")
+    future.add_done_callback(lambda f: _job_finished(job_id, f))
+    logging.info(f"Queued topic job {job_id} with {len(documents)} documents")
+    return {"status": "accepted", "job_id": job_id}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Report a job's status, current stage and per-stage timings in seconds."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    state = progress.get(job_id) or {"stage": None, "stages": {}}
+    status = "running" if job["status"] == "queued" and state["stage"] is not None else job["status"]
+    return {**job, "status": status, "stage": state["stage"], "stages": state["stages"]}
+
+
+@app.get("/state")
+async def get_state():
+    """Report how far the model has read customer_chat, so callers only send newer messages."""
+    return {
+        "fitted": results is not None,
+        "version": results["version"] if results else None,
+        "high_water_mark": results["high_water_mark"] if results else 0,
+        "documents_seen": results["documents_seen"] if results else 0,
+        "pending_jobs": sum(job["status"] in ("queued", "running") for job in jobs.values()),
+    }
+
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """Report hit rate and size of the preprocessing cache as of the latest completed job."""
+    if not results:
+        raise HTTPException(
+            status_code=404, detail="No job has completed yet.")
+    return results["cache"]
 
-@app.post("/process")
-async def process_documents(input_data: DocumentInput):
-    """Process documents and generate topic modeling results."""
-    global results
+
+@app.post("/assign")
+async def assign_topics(input_data: AssignInput):
+    """Return the topic distribution of new messages using the latest fitted model, without refitting."""
+    if not input_data.documents:
+        raise HTTPException(
+            status_code=400, detail="No documents provided")
+    current = results
+    if not current:
+        raise HTTPException(
+            status_code=404, detail="No topic model available. Run /process first.")
     try:
-        documents = input_data.documents
-        if not documents:
-            logging.info("No documents provided")
-            raise HTTPException(
-                status_code=400, detail="No documents provided")
-
-        if any(not doc.strip() for doc in documents):
-            logging.info("Some documents are empty")
-            raise HTTPException(
-                status_code=400, detail="Some documents are empty")
-
-        _, cleaned = preprocessor.preprocess(documents)
-
-        model = pipeline.fit_nmf(cleaned)
-        results = pipeline.get_nmf_results()
-        logging.info("Topic modeling completed")
-        return {"status": "success", "message": "Topic modeling completed"}
+        assignments = await asyncio.to_thread(assigner.assign, input_data.documents,
+                                              current["topics"], current["version"])
     except Exception as e:
-        logging.info(f"Error processing documents: {str(e)}")
+        logging.info(f"Error assigning topics: {str(e)}")
         raise HTTPException(
-            status_code=500, detail=f"Error processing documents: {str(e)}")
+            status_code=500, detail=f"Error assigning topics: {str(e)}")
+    return {"version": assigner.version, "assignments": assignments}
 
 
 @app.get("/topics", response_model=List[Topic])
 async def get_topics():
-    """Get all topics with name, description, frequency, and mentions."""
+    """Get all topics of the latest completed job; the model version is sent in X-Topic-Model-Version."""
     if not results or not results["topics"]:
         logging.info("No topics available. Run /process first.")
         raise HTTPException(
             status_code=404, detail="No topics available. Run /process first.")
     logging.info(f"send available topics")
-    return JSONResponse(content=results["topics"])
+    return JSONResponse(content=results["topics"],
+                        headers={"X-Topic-Model-Version": str(results["version"])})
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+from logger import logging
+from nmf import TextPreprocessor, TopicModelingPipeline
+from preprocess_cache import PreprocessCache
+
+
+class TopicAssigner:
+    """
+    Assign new documents to the topics of the latest published model without refitting.
+
+    The job worker owns model training; the assigner keeps a read-only copy of the persisted
+    model and frozen phrase models and reloads them when a newer version is published.
+    """
+
+    def __init__(self, settings: Dict[str, Any], batch_size: int = 512):
+        """
+        Args:
+            settings (Dict[str, Any]): Service settings with the artifact paths.
+            batch_size (int): Documents preprocessed and transformed per batch.
+        """
+        self.settings = settings
+        self.batch_size = batch_size
+        self.preprocessor = None
+        self.pipeline: Optional[TopicModelingPipeline] = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def load(self, version: int):
+        """Load spaCy and the persisted model up front so the first assignment is fast."""
+        with self._lock:
+            self._ensure_loaded(version)
+
+    def _ensure_loaded(self, version: int):
+        if self.version == version:
+            return
+        if self.preprocessor is None:
+            self.preprocessor = TextPreprocessor(
+                batch_size=self.settings["lemmatize_batch_size"],
+                cache=PreprocessCache(self.settings["cache_path"],
+                                      max_entries=self.settings["cache_max_entries"]),
+            )
+        pipeline = TopicModelingPipeline.load(self.settings["model_path"])
+        self.preprocessor.reset_phrases()
+        self.preprocessor.load_phrases(self.settings["phrases_path"])
+        self.pipeline = pipeline
+        self.version = pipeline.version
+        logging.info(f"Topic assigner loaded model version {self.version}")
+
+    def assign(self, documents: List[str], topics: List[Dict[str, Any]], version: int) -> List[Dict[str, Any]]:
+        """
+        Return the dominant topic and topic weights of each document.
+
+        Args:
+            documents (List[str]): Raw messages.
+            topics (List[Dict[str, Any]]): Topics of the published result, used for names.
+            version (int): Published model version; the persisted model is reloaded when it differs from the loaded one.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per document; topic_id is None when no known term matched.
+        """
+        names = {topic["topic_id"]: topic["topic_name"] for topic in topics}
+        assignments = []
+        # spaCy pipelines are not guaranteed to be thread-safe, and assignments are cheap.
+        with self._lock:
+            self._ensure_loaded(version)
+            for start in range(0, len(documents), self.batch_size):
+                _, cleaned = self.preprocessor.preprocess(documents[start:start + self.batch_size],
+                                                          update_phrases=False)
+                weights = self.pipeline.assign(cleaned)
+                for row in weights:
+                    topic_id = int(row.argmax()) if row.any() else None
+                    assignments.append({
+                        "topic_id": topic_id,
+                        "topic_name": names.get(topic_id),
+                        "weights": [round(float(weight), 4) for weight in row],
+                    })
+        return assignments
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+from logger import logging
+from nmf import TextPreprocessor, TopicModelingPipeline
+from preprocess_cache import PreprocessCache
+
+# State owned by the job worker process; only ever touched from inside the worker.
+_settings: Dict[str, Any] = {}
+_preprocessor: Optional[TextPreprocessor] = None
+_pipeline: Optional[TopicModelingPipeline] = None
+
+
+def _load_state():
+    global _pipeline
+    _preprocessor.reset_phrases()
+    try:
+        _preprocessor.load_phrases(_settings["phrases_path"])
+    except Exception as e:
+        logging.info(f"Could not load phrase models, they will be retrained: {str(e)}")
+    _pipeline = TopicModelingPipeline(n_topics=_settings["n_topics"])
+    if os.path.exists(_settings["model_path"]):
+        try:
+            _pipeline = TopicModelingPipeline.load(_settings["model_path"])
+        except Exception as e:
+            logging.info(f"Could not load topic model, starting empty: {str(e)}")
+
+
+def init_worker(settings: Dict[str, Any]):
+    """Process pool initializer: load spaCy, the phrase models and the topic model once per worker."""
+    global _settings, _preprocessor
+    _settings = settings
+    _preprocessor = TextPreprocessor(
+        batch_size=settings["lemmatize_batch_size"],
+        n_process=settings["lemmatize_n_process"],
+        cache=PreprocessCache(settings["cache_path"], max_entries=settings["cache_max_entries"]),
+    )
+    _load_state()
+    logging.info("Topic job worker ready")
+
+
+def load_results(path: str) -> Optional[Dict[str, Any]]:
+    """Load the latest published job result, or None if no job has completed yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _publish_results(result: Dict[str, Any]):
+    path = _settings["results_path"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp_path, path)
+
+
+def _snapshot_saved_state() -> Dict[str, Any]:
+    """Remember the saved phrase version and keep a copy of the saved model, so a failed save can be undone."""
+    model_path = _settings["model_path"]
+    backup = None
+    if os.path.exists(model_path):
+        backup = f"{model_path}.prev"
+        shutil.copy2(model_path, backup)
+    return {"phrases": TextPreprocessor.current_phrases(_settings["phrases_path"]), "model_backup": backup}
+
+
+def _restore_saved_state(snapshot: Dict[str, Any]):
+    """Put back the phrase pointer and model file recorded by _snapshot_saved_state."""
+    TextPreprocessor.set_current_phrases(_settings["phrases_path"], snapshot["phrases"])
+    if snapshot["model_backup"] is not None:
+        os.replace(snapshot["model_backup"], _settings["model_path"])
+    elif os.path.exists(_settings["model_path"]):
+        os.remove(_settings["model_path"])
+
+
+def run_job(job_id: str, documents: List[str], last_message_id: Optional[int], full_refit: bool,
+            progress) -> Dict[str, Any]:
+    """
+    Run one topic modelling job inside the worker process.
+
+    Args:
+        job_id (str): Id under which stage progress is reported.
+        documents (List[str]): Raw documents to process.
+        last_message_id (Optional[int]): Highest customer_chat.message_id included in documents.
+        full_refit (bool): Retrain phrases, vectorizer and NMF from scratch.
+        progress: Shared mapping updated with the current stage and per-stage timings.
+
+    Returns:
+        Dict[str, Any]: The published result: version, topics, model state and timings.
+    """
+    global _pipeline
+    stages = {}
+
+    def stage(name, func, *args):
+        progress[job_id] = {"stage": name, "stages": dict(stages)}
+        start = time.perf_counter()
+        value = func(*args)
+        stages[name] = round(time.perf_counter() - start, 4)
+        return value
+
+    try:
+        full_refit = full_refit or _pipeline.nmf_model is None
+        if full_refit:
+            _preprocessor.reset_phrases()
+            _pipeline = TopicModelingPipeline(n_topics=_settings["n_topics"])
+        tokens = stage("clean_and_tokenize", _preprocessor.clean_and_tokenize, documents)
+        ngrams = stage("build_ngrams", _preprocessor.build_ngrams, tokens)
+        lemmatized = stage("lemmatize", _preprocessor.lemmatize, ngrams)
+        cleaned = [" ".join(doc) for doc in lemmatized]
+        if full_refit:
+            stage("fit_nmf", _pipeline.fit_nmf, cleaned, documents)
+        else:
+            stage("partial_fit_nmf", lambda: _pipeline.partial_fit_nmf(cleaned, originals=documents))
+        results = stage("results", _pipeline.get_nmf_results)
+
+        if last_message_id is not None:
+            _pipeline.high_water_mark = max(_pipeline.high_water_mark, last_message_id)
+        _pipeline.version += 1
+
+        def save():
+            _preprocessor.save_phrases(_settings["phrases_path"])
+            _pipeline.save(_settings["model_path"])
+
+        # Phrases, model and published result move to the new version together: if any of them
+        # fails to save, the ones already written are rolled back.
+        snapshot = _snapshot_saved_state()
+        try:
+            stage("save", save)
+            result = {
+                "version": _pipeline.version,
+                "job_id": job_id,
+                "mode": "full" if full_refit else "incremental",
+                "high_water_mark": _pipeline.high_water_mark,
+                "documents_seen": _pipeline.documents_seen,
+                "topics": results["topics"],
+                "lemmatize": _preprocessor.last_lemmatize_stats,
+                "cache": _preprocessor.cache.stats(),
+                "stages": stages,
+            }
+            _publish_results(result)
+        except Exception:
+            _restore_saved_state(snapshot)
+            raise
+        finally:
+            if snapshot["model_backup"] is not None and os.path.exists(snapshot["model_backup"]):
+                os.remove(snapshot["model_backup"])
+        progress[job_id] = {"stage": "done", "stages": stages}
+        logging.info(f"Topic job {job_id} completed ({result['mode']}, {len(documents)} documents, "
+                     f"version {result['version']})")
+        return result
+    except Exception as e:
+        logging.exception(f"Topic job {job_id} failed: {str(e)}")
+        # Drop whatever the failed job changed in memory and continue from the last saved state.
+        _load_state()
+        raise
@@ -1,12 +1,20 @@
+import hashlib
+import os
 import re
+import shutil
+import tempfile
+import time
+import joblib
 import nltk
+import numpy as np
 from nltk.corpus import stopwords
 import spacy
-from gensim.models import Phrases
+from gensim.models.phrases import FrozenPhrases, Phrases
 from sklearn.decomposition import NMF
 from sklearn.feature_extraction.text import TfidfVectorizer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from data import fetch_data
+from preprocess_cache import PreprocessCache
 from logger import logging
 
 
@@ -21,10 +29,27 @@ def download_resources():
 
 
 class TextPreprocessor:
-    def __init__(self, lemmatizer_model: str = 'en_core_web_sm'):
+    def __init__(self, lemmatizer_model: str = 'en_core_web_sm', batch_size: int = 256, n_process: int = 1,
+                 cache: Optional[PreprocessCache] = None):
+        """
+        Args:
+            lemmatizer_model (str): spaCy model used for lemmatization.
+            batch_size (int): Documents per nlp.pipe batch.
+            n_process (int): Worker processes for nlp.pipe; 1 keeps everything in-process.
+            cache (Optional[PreprocessCache]): Cache of lemmatized documents; None disables caching.
+        """
         download_resources()
         self.stop_words = set(stopwords.words('english'))
-        self.nlp = spacy.load(lemmatizer_model, disable=['parser', 'ner'])
+        # Lemmas only need the tagger and attribute ruler, so the heavier components are not loaded at all.
+        self.nlp = spacy.load(lemmatizer_model, exclude=['parser', 'ner', 'senter'])
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.cache = cache
+        # Cache entries are only valid for the spaCy model and stop words that produced them.
+        stop_words_hash = hashlib.sha256("\n".join(sorted(self.stop_words)).encode()).hexdigest()[:16]
+        self.cache_namespace = f"{lemmatizer_model}:{self.nlp.meta.get('version', '')}:{stop_words_hash}"
+        self.last_lemmatize_stats = None
+        self.reset_phrases()
 
     def clean_and_tokenize(self, documents):
         cleaned = [re.sub(r"[^a-zA-Z0-9 ]+", " ", re.sub(r"\s+", " ", doc)).lower()
@@ -32,23 +57,143 @@ class TextPreprocessor:
         return [[t for t in doc.split() if t not in self.stop_words and len(t) > 2]
                 for doc in cleaned]
 
+    def reset_phrases(self):
+        """Forget the learned bigram/trigram models so the next build_ngrams call trains them from scratch."""
+        self.bigram = None
+        self.trigram = None
+        self.bigram_frozen = None
+        self.trigram_frozen = None
+
     def build_ngrams(self, tokenized, min_count=5, threshold=100):
-        bigram = Phrases(tokenized, min_count=min_count, threshold=threshold)
-        trigram = Phrases(bigram[tokenized], min_count=min_count, threshold=threshold)
-        return [trigram[bigram[doc]] for doc in tokenized]
+        """
+        Learn phrases from the tokenized documents and apply them.
+
+        The first call trains the bigram and trigram models; later calls only add the new
+        documents' counts to them. Documents are always transformed with the frozen models,
+        which are much faster to apply than the learnable ones.
+        """
+        if self.bigram is None:
+            self.bigram = Phrases(tokenized, min_count=min_count, threshold=threshold)
+        else:
+            self.bigram.add_vocab(tokenized)
+        self.bigram_frozen = self.bigram.freeze()
+        bigrams = [self.bigram_frozen[doc] for doc in tokenized]
+
+        if self.trigram is None:
+            self.trigram = Phrases(bigrams, min_count=min_count, threshold=threshold)
+        else:
+            self.trigram.add_vocab(bigrams)
+        self.trigram_frozen = self.trigram.freeze()
+        return [self.trigram_frozen[doc] for doc in bigrams]
+
+    def apply_ngrams(self, tokenized):
+        """Join phrases with the frozen models only, without learning from the documents."""
+        if self.bigram_frozen is None:
+            return tokenized
+        return [self.trigram_frozen[self.bigram_frozen[doc]] for doc in tokenized]
+
+    PHRASE_MODELS = ('bigram', 'trigram', 'bigram_frozen', 'trigram_frozen')
+
+    def save_phrases(self, directory: str, keep: int = 2):
+        """
+        Persist the learnable and frozen phrase models to a new version under directory.
+
+        The four models are written to a staging directory that is renamed into place, then the
+        CURRENT pointer is atomically replaced, so a concurrent load_phrases sees either the old
+        or the new set, never a mix. The previous keep versions are kept for readers still loading them.
+        """
+        if self.bigram is None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=directory)
+        for name in self.PHRASE_MODELS:
+            getattr(self, name).save(os.path.join(staging, f"{name}.model"))
+        version = f"phrases-{time.time_ns()}"
+        os.rename(staging, os.path.join(directory, version))
+        self.set_current_phrases(directory, version)
+
+        previous = sorted(name for name in os.listdir(directory) if name.startswith("phrases-") and name != version)
+        for name in previous[:max(len(previous) - keep, 0)]:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        logging.info(f"Saved phrase models to {directory} as {version}")
+
+    @staticmethod
+    def current_phrases(directory: str) -> Optional[str]:
+        """Return the phrase version the CURRENT pointer names, or None if nothing was saved with versions yet."""
+        pointer = os.path.join(directory, "CURRENT")
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return f.read().strip()
+
+    @staticmethod
+    def set_current_phrases(directory: str, version: Optional[str]):
+        """Atomically point CURRENT at a saved phrase version; None removes the pointer."""
+        pointer = os.path.join(directory, "CURRENT")
+        if version is None:
+            if os.path.exists(pointer):
+                os.remove(pointer)
+            return
+        pointer_tmp = os.path.join(directory, "CURRENT.tmp")
+        with open(pointer_tmp, "w") as f:
+            f.write(version)
+        os.replace(pointer_tmp, pointer)
+
+    def load_phrases(self, directory: str) -> bool:
+        """Load the current phrase models saved with save_phrases, returning False if there are none."""
+        version = self.current_phrases(directory)
+        if version is not None:
+            source = os.path.join(directory, version)
+        else:
+            # Layout written before versioning: the models directly in directory.
+            source = directory
+        if not os.path.exists(os.path.join(source, "trigram_frozen.model")):
+            return False
+        self.bigram = Phrases.load(os.path.join(source, "bigram.model"))
+        self.trigram = Phrases.load(os.path.join(source, "trigram.model"))
+        self.bigram_frozen = FrozenPhrases.load(os.path.join(source, "bigram_frozen.model"))
+        self.trigram_frozen = FrozenPhrases.load(os.path.join(source, "trigram_frozen.model"))
+        logging.info(f"Loaded phrase models from {source}")
+        return True
 
     def lemmatize(self, ngrams):
-        lemmatized = []
-        for doc in ngrams:
-            spacy_doc = self.nlp(" ".join(doc))
-            tokens = [token.lemma_ for token in spacy_doc
-                      if token.lemma_ not in self.stop_words and len(token.lemma_) > 2]
-            lemmatized.append(tokens)
+        start = time.perf_counter()
+        texts = [" ".join(doc) for doc in ngrams]
+        if self.cache is not None:
+            keys = [PreprocessCache.key(text, self.cache_namespace) for text in texts]
+            lemmas = self.cache.get_many(keys)
+        else:
+            keys, lemmas = texts, {}
+        # Deduplicated texts that still need spaCy, keyed like the cache.
+        missing = {key: text for key, text in zip(keys, texts) if key not in lemmas}
+
+        computed = {}
+        docs = self.nlp.pipe(missing.values(), batch_size=self.batch_size, n_process=self.n_process)
+        for key, spacy_doc in zip(missing, docs):
+            computed[key] = [token.lemma_ for token in spacy_doc
+                             if token.lemma_ not in self.stop_words and len(token.lemma_) > 2]
+        if self.cache is not None:
+            self.cache.put_many(computed)
+        lemmas.update(computed)
+        lemmatized = [list(lemmas[key]) for key in keys]
+
+        elapsed = time.perf_counter() - start
+        self.last_lemmatize_stats = {
+            "docs": len(lemmatized),
+            "lemmatized": len(missing),
+            "reused": len(lemmatized) - len(missing),
+            "seconds": round(elapsed, 4),
+            "docs_per_sec": round(len(lemmatized) / elapsed, 1) if elapsed > 0 else None,
+            "batch_size": self.batch_size,
+            "n_process": self.n_process,
+        }
+        logging.info(f"Lemmatized {len(lemmatized)} documents ({len(missing)} through spaCy) at {self.last_lemmatize_stats['docs_per_sec']} docs/sec "
+                     f"(batch_size={self.batch_size}, n_process={self.n_process})")
         return lemmatized
 
-    def preprocess(self, documents):
+    def preprocess(self, documents, update_phrases=True):
         tokens = self.clean_and_tokenize(documents)
-        ngrams = self.build_ngrams(tokens)
+        ngrams = self.build_ngrams(tokens) if update_phrases else self.apply_ngrams(tokens)
         lemmatized = self.lemmatize(ngrams)
         joined = [" ".join(doc) for doc in lemmatized]
         return lemmatized, joined
@@ -59,8 +204,27 @@ class TopicModelingPipeline:
         self.n_topics = n_topics
         self.nmf_model = None
         self.vectorizer = None
+        # Running sufficient statistics W^T X and W^T W over every document seen,
+        # used to update the topic-term matrix without refitting on the full corpus.
+        self.wtx = None
+        self.wtw = None
+        self.documents_seen = 0
+        self.high_water_mark = 0
+        self.version = 0
+        # Per-topic counts of documents whose dominant topic it is, and the highest-weighted
+        # original documents per topic, both accumulated over every fit and update.
+        self.topic_doc_counts = None
+        self.representatives = None
+        self.results = None
+
+    def fit_nmf(self, documents, originals=None):
+        """
+        Fit the vectorizer and NMF from scratch.
 
-    def fit_nmf(self, documents):
+        Args:
+            documents (List[str]): Preprocessed documents.
+            originals (Optional[List[str]]): Raw documents aligned with documents, kept as topic representatives.
+        """
         try:
             # TF-IDF Vectorization
             self.vectorizer = TfidfVectorizer(max_df=0.95, min_df=2, stop_words='english')
@@ -68,20 +232,128 @@ class TopicModelingPipeline:
 
             # NMF Model Fitting
             self.nmf_model = NMF(n_components=self.n_topics, random_state=42)
-            self.nmf_model.fit(doc_term_matrix)
+            doc_topic = self.nmf_model.fit_transform(doc_term_matrix)
+            self.wtx = np.asarray(doc_term_matrix.T.dot(doc_topic).T)
+            self.wtw = doc_topic.T @ doc_topic
+            self.documents_seen = len(documents)
+            self.topic_doc_counts = None
+            self.representatives = None
+            self._update_document_stats(doc_topic, originals)
             return self.nmf_model
         except Exception as e:
             logging.exception(f"Failed to fit NMF model: {str(e)}")
             raise ValueError(f"Failed to fit NMF model: {str(e)}")
 
-    def get_nmf_results(self) -> Dict[str, Any]:
+    def partial_fit_nmf(self, documents, n_iter=20, originals=None):
+        """
+        Update a fitted model with new documents only.
+
+        The vectorizer vocabulary and IDF weights stay frozen; new documents are projected onto
+        the current topics and the topic-term matrix is re-estimated from the running
+        statistics of all documents seen so far with multiplicative updates.
+
+        Args:
+            documents (List[str]): Preprocessed new documents.
+            n_iter (int): Multiplicative update steps applied to the topic-term matrix.
+            originals (Optional[List[str]]): Raw documents aligned with documents, kept as topic representatives.
+
+        Returns:
+            NMF: The updated model.
+        """
+        if self.nmf_model is None or self.wtx is None:
+            raise ValueError("Model must be fitted with fit_nmf before partial_fit_nmf")
+        try:
+            doc_term_matrix = self.vectorizer.transform(documents)
+            doc_topic = self.nmf_model.transform(doc_term_matrix)
+            self.wtx += np.asarray(doc_term_matrix.T.dot(doc_topic).T)
+            self.wtw += doc_topic.T @ doc_topic
+
+            components = self.nmf_model.components_
+            eps = np.finfo(components.dtype).eps
+            for _ in range(n_iter):
+                components *= self.wtx / np.maximum(self.wtw @ components, eps)
+            self.nmf_model.components_ = components
+            self.documents_seen += len(documents)
+            self._update_document_stats(doc_topic, originals)
+            return self.nmf_model
+        except Exception as e:
+            logging.exception(f"Failed to update NMF model: {str(e)}")
+            raise ValueError(f"Failed to update NMF model: {str(e)}")
+
+    def _update_document_stats(self, doc_topic, originals=None, n_representatives=3):
+        """Add a batch's dominant-topic counts and best documents per topic from its document-topic matrix."""
+        n_topics = doc_topic.shape[1]
+        assigned = doc_topic.max(axis=1) > 0
+        counts = np.bincount(doc_topic.argmax(axis=1)[assigned], minlength=n_topics)
+        self.topic_doc_counts = counts if self.topic_doc_counts is None else self.topic_doc_counts + counts
+
+        if self.representatives is None:
+            self.representatives = [[] for _ in range(n_topics)]
+        if originals is None or not len(originals):
+            return
+        # Chat messages repeat a lot, so look past the first few to find distinct representatives.
+        k = min(n_representatives * 10, doc_topic.shape[0])
+        best = np.argpartition(-doc_topic, k - 1, axis=0)[:k]
+        for topic in range(n_topics):
+            candidates = self.representatives[topic] + [
+                (float(doc_topic[i, topic]), originals[i]) for i in best[:, topic] if doc_topic[i, topic] > 0
+            ]
+            unique = {}
+            for weight, text in sorted(candidates, key=lambda c: c[0], reverse=True):
+                unique.setdefault(text, weight)
+            self.representatives[topic] = [(weight, text) for text, weight in unique.items()][:n_representatives]
+
+    def save(self, path: str):
+        """Persist the fitted pipeline atomically to path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+        logging.info(f"Saved topic model to {path}")
+
+    @staticmethod
+    def load(path: str) -> "TopicModelingPipeline":
+        """Load a pipeline saved with save()."""
+        pipeline = joblib.load(path)
+        logging.info(f"Loaded topic model from {path} (high-water mark {pipeline.high_water_mark})")
+        return pipeline
+
+    def assign(self, documents) -> np.ndarray:
+        """
+        Compute the topic distribution of preprocessed documents with the fitted vectorizer and NMF.
+
+        Args:
+            documents (List[str]): Preprocessed documents.
+
+        Returns:
+            np.ndarray: (n_documents, n_topics) weights normalized to sum to 1; all zeros for
+            documents with no known terms.
+        """
+        if self.nmf_model is None:
+            raise ValueError("Model must be fitted before assigning topics")
+        doc_topic = self.nmf_model.transform(self.vectorizer.transform(documents))
+        totals = doc_topic.sum(axis=1, keepdims=True)
+        return np.divide(doc_topic, totals, out=np.zeros_like(doc_topic), where=totals > 0)
+
+    def get_nmf_results(self, top_k=10) -> Dict[str, Any]:
+        """
+        Build the topic list and keep it on the pipeline, so it is saved with the model.
+
+        Top words come from argpartition over each topic row, so only the top_k entries are sorted.
+        """
         try:
-            # Extract topics and their top words
             terms = self.vectorizer.get_feature_names_out()
+            components = self.nmf_model.components_
+            k = min(top_k, components.shape[1])
+            top_idx = np.argpartition(-components, k - 1, axis=1)[:, :k]
+            # Highest weight first; equal weights in vocabulary (alphabetical) order.
+            order = np.lexsort((top_idx, -np.take_along_axis(components, top_idx, axis=1)))
+            top_idx = np.take_along_axis(top_idx, order, axis=1)
+
+            representatives = self.representatives or [[] for _ in top_idx]
             topics = []
-            for topic_idx, topic in enumerate(self.nmf_model.components_):
-                top_idx = topic.argsort()[-10:][::-1]  # Get top 10 words per topic
-                top_words = [terms[i] for i in top_idx]
+            for topic_idx, word_idx in enumerate(top_idx):
+                top_words = [terms[i] for i in word_idx]
                 topic_name = " ".join(top_words[:2]).title()
                 description = f"Topics related to {', '.join(top_words[:5])}"
 
@@ -89,10 +361,13 @@ class TopicModelingPipeline:
                     "topic_id": topic_idx,
                     "topic_name": topic_name,
                     "description": description,
-                    "top_words": top_words
+                    "top_words": top_words,
+                    "frequency": int(self.topic_doc_counts[topic_idx]) if self.topic_doc_counts is not None else 0,
+                    "representative_documents": [text for _, text in representatives[topic_idx]],
                 })
 
-            return {"topics": topics}
+            self.results = {"topics": topics}
+            return self.results
         except Exception as e:
             logging.exception(f"Exception in topic model pipeline {str(e)}")
             raise ValueError(f"Failed to generate NMF results: {str(e)}")
@@ -102,6 +377,7 @@ if __name__ == '__main__':
     docs = fetch_data()
     preprocessor = TextPreprocessor()
     tokens, cleaned = preprocessor.preprocess(docs)
+    print("Lemmatization:", preprocessor.last_lemmatize_stats)
 
     pipeline = TopicModelingPipeline(n_topics=6)
     try:
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from logger import logging
+
+
+class PreprocessCache:
+    """
+    Content-addressed on-disk cache of lemmatized token lists, backed by SQLite.
+
+    Entries are keyed by a hash of the text handed to spaCy plus a namespace identifying the
+    model, so identical messages are only lemmatized once. When the cache grows beyond
+    max_entries the least recently used entries are deleted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        """
+        Args:
+            path (str): SQLite database file, created if missing.
+            max_entries (int): Entries kept before the least recently used are evicted.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lemma_cache ("
+            "key TEXT PRIMARY KEY, tokens TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lemma_cache_last_used ON lemma_cache (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(text: str, namespace: str = "") -> str:
+        return hashlib.sha1(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Return the cached token lists for the keys that are present, marking them as used."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, tokens FROM lemma_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((key, json.loads(tokens)) for key, tokens in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE lemma_cache SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: Dict[str, List[str]]):
+        """Store token lists and evict the least recently used entries beyond max_entries."""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO lemma_cache (key, tokens, last_used) VALUES (?, ?, ?)",
+                [(key, json.dumps(tokens), now) for key, tokens in entries.items()]
+            )
+            overflow = self._count() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM lemma_cache WHERE key IN "
+                    "(SELECT key FROM lemma_cache ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+                logging.info(f"Evicted {overflow} entries from the preprocessing cache")
+            self._conn.commit()
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM lemma_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            entries = self._count()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+        }
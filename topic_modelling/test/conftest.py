@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+
+TOPIC_MODELLING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if TOPIC_MODELLING_DIR not in sys.path:
+    sys.path.insert(0, TOPIC_MODELLING_DIR)
+
+TOPIC_WORDS = [
+    ['bill', 'charge', 'payment', 'invoice', 'refund', 'overcharge', 'price', 'fee'],
+    ['internet', 'slow', 'wifi', 'router', 'outage', 'speed', 'connection', 'signal'],
+    ['contract', 'cancel', 'upgrade', 'plan', 'renewal', 'offer', 'discount', 'term'],
+]
+
+
+def make_documents(n: int, seed: int = 0, extra_words=()) -> list:
+    """Short preprocessed documents, each drawn mostly from one of three topics' vocabularies."""
+    rng = np.random.default_rng(seed)
+    documents = []
+    for _ in range(n):
+        words = list(rng.choice(TOPIC_WORDS[rng.integers(len(TOPIC_WORDS))], 6))
+        words += list(rng.choice(sum(TOPIC_WORDS, []), 1)) + list(extra_words)
+        documents.append(" ".join(words))
+    return documents
+
+
+def make_preprocessor(cache_dir: str, stop_words=('the', 'and', 'was')):
+    """
+    A TextPreprocessor that needs neither the NLTK stop word corpus nor a downloaded spaCy model.
+
+    Lemmas are the lower-cased tokens of a blank English pipeline, which is enough for the
+    job and model code under test.
+    """
+    import spacy
+    from spacy.language import Language
+
+    from nmf import TextPreprocessor
+    from preprocess_cache import PreprocessCache
+
+    if 'lower_lemma' not in Language.factories:
+        @Language.component('lower_lemma')
+        def lower_lemma(doc):
+            for token in doc:
+                token.lemma_ = token.lower_
+            return doc
+
+    preprocessor = TextPreprocessor.__new__(TextPreprocessor)
+    preprocessor.stop_words = set(stop_words)
+    preprocessor.nlp = spacy.blank('en')
+    preprocessor.nlp.add_pipe('lower_lemma')
+    preprocessor.batch_size = 64
+    preprocessor.n_process = 1
+    preprocessor.cache = PreprocessCache(os.path.join(cache_dir, 'preprocess_cache.sqlite'))
+    preprocessor.cache_namespace = 'blank-en'
+    preprocessor.last_lemmatize_stats = None
+    preprocessor.reset_phrases()
+    return preprocessor
@@ -0,0 +1,133 @@
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from conftest import make_documents, make_preprocessor
+import jobs
+from nmf import TextPreprocessor, TopicModelingPipeline
+
+pytest.importorskip('fastapi')
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    """The job worker's state, set up in-process the way init_worker would in the worker process."""
+    settings = {
+        'model_path': str(tmp_path / 'topic_model.joblib'),
+        'phrases_path': str(tmp_path / 'phrases'),
+        'results_path': str(tmp_path / 'topics.json'),
+        'n_topics': 3,
+    }
+    monkeypatch.setattr(jobs, '_settings', settings)
+    monkeypatch.setattr(jobs, '_preprocessor', make_preprocessor(str(tmp_path)))
+    monkeypatch.setattr(jobs, '_pipeline', TopicModelingPipeline(n_topics=3))
+    return settings
+
+
+def saved_state(settings):
+    """Everything a failed job must leave untouched: published result, saved model and phrase pointer."""
+    with open(settings['model_path'], 'rb') as f:
+        model = f.read()
+    return (jobs.load_results(settings['results_path']), model,
+            TextPreprocessor.current_phrases(settings['phrases_path']))
+
+
+def fail(*args, **kwargs):
+    raise RuntimeError('boom')
+
+
+@pytest.mark.parametrize('target, attribute', [
+    (TopicModelingPipeline, 'get_nmf_results'),
+    (TopicModelingPipeline, 'save'),
+    (jobs, '_publish_results'),
+])
+def test_failed_job_leaves_published_version_and_model_unchanged(worker, monkeypatch, target, attribute):
+    first = jobs.run_job('first', make_documents(120, seed=0), 100, False, {})
+    assert first['version'] == 1
+    before = saved_state(worker)
+    wtx = jobs._pipeline.wtx.copy()
+
+    with monkeypatch.context() as failing:
+        failing.setattr(target, attribute, fail)
+        with pytest.raises(RuntimeError, match='boom'):
+            jobs.run_job('second', make_documents(40, seed=1), 200, False, {})
+
+    assert saved_state(worker) == before
+    assert not os.path.exists(f"{worker['model_path']}.prev")
+    # The worker continues from the saved state, not from the failed job's in-memory updates.
+    assert jobs._pipeline.version == 1
+    assert jobs._pipeline.high_water_mark == 100
+    np.testing.assert_array_equal(jobs._pipeline.wtx, wtx)
+
+    third = jobs.run_job('third', make_documents(40, seed=2), 300, False, {})
+    assert (third['version'], third['mode'], third['high_water_mark']) == (2, 'incremental', 300)
+
+
+def test_failed_first_job_publishes_nothing(worker, monkeypatch):
+    monkeypatch.setattr(jobs, '_publish_results', fail)
+    with pytest.raises(RuntimeError, match='boom'):
+        jobs.run_job('first', make_documents(120, seed=0), 100, False, {})
+    assert not os.path.exists(worker['model_path'])
+    assert TextPreprocessor.current_phrases(worker['phrases_path']) is None
+    assert jobs._pipeline.nmf_model is None
+
+
+@pytest.fixture
+def service(worker, monkeypatch):
+    """The topic API with the job worker replaced by a single in-process thread."""
+    sys.modules.pop('api.service', None)
+    module = importlib.import_module('api.service')
+    monkeypatch.setattr(module.app.router, 'on_startup', [])
+    monkeypatch.setattr(module.app.router, 'on_shutdown', [])
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(module, 'executor', executor)
+    monkeypatch.setattr(module, 'progress', {})
+    yield module
+    executor.shutdown(wait=True)
+    sys.modules.pop('api.service', None)
+
+
+def wait_for(client, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/jobs/{job_id}').json()
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_jobs_apply_in_submission_order(service, monkeypatch):
+    partial_fit_nmf = TopicModelingPipeline.partial_fit_nmf
+
+    def failing_on_marker(self, documents, *args, **kwargs):
+        if any('boom' in doc for doc in kwargs.get('originals') or ()):
+            raise RuntimeError('boom')
+        return partial_fit_nmf(self, documents, *args, **kwargs)
+
+    monkeypatch.setattr(TopicModelingPipeline, 'partial_fit_nmf', failing_on_marker)
+    batches = [
+        (make_documents(120, seed=0), 100),
+        (make_documents(30, seed=1), 200),
+        (make_documents(30, seed=2, extra_words=['boom']), 300),
+        (make_documents(30, seed=3), 400),
+    ]
+    with TestClient(service.app) as client:
+        job_ids = [client.post('/process', json={'documents': documents, 'last_message_id': last_id}).json()['job_id']
+                   for documents, last_id in batches]
+        finished = [wait_for(client, job_id) for job_id in job_ids]
+        state = client.get('/state').json()
+
+    assert [job['status'] for job in finished] == ['succeeded', 'succeeded', 'failed', 'succeeded']
+    assert [job.get('version') for job in finished] == [1, 2, None, 3]
+    assert [job.get('mode') for job in finished] == ['full', 'incremental', None, 'incremental']
+    # Only the jobs that succeeded count towards the model's documents.
+    assert (state['version'], state['high_water_mark'], state['documents_seen']) == (3, 400, 180)
+    assert service.results['job_id'] == job_ids[-1]
+    assert jobs.load_results(jobs._settings['results_path'])['version'] == 3
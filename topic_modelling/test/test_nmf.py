@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import normalize
+
+from conftest import make_documents
+from nmf import TopicModelingPipeline
+
+
+def reconstruction_error(pipeline, documents):
+    """Relative Frobenius error of the documents' TF-IDF matrix under the pipeline's topics."""
+    X = pipeline.vectorizer.transform(documents)
+    W = pipeline.nmf_model.transform(X)
+    return np.linalg.norm(X.toarray() - W @ pipeline.nmf_model.components_) / np.linalg.norm(X.toarray())
+
+
+@pytest.fixture
+def fitted():
+    pipeline = TopicModelingPipeline(n_topics=3)
+    documents = make_documents(150, seed=0)
+    pipeline.fit_nmf(documents, originals=documents)
+    return pipeline
+
+
+def test_partial_fit_keeps_the_vocabulary_frozen(fitted):
+    vocabulary = dict(fitted.vectorizer.vocabulary_)
+    idf = fitted.vectorizer.idf_.copy()
+    new_documents = make_documents(50, seed=1, extra_words=['roaming', 'voicemail'])
+    fitted.partial_fit_nmf(new_documents)
+    assert fitted.vectorizer.vocabulary_ == vocabulary
+    np.testing.assert_array_equal(fitted.vectorizer.idf_, idf)
+    assert fitted.nmf_model.components_.shape == (3, len(vocabulary))
+    assert 'roaming' not in fitted.vectorizer.vocabulary_
+
+
+def test_partial_fit_accumulates_statistics(fitted):
+    wtx, wtw = fitted.wtx.copy(), fitted.wtw.copy()
+    new_documents = make_documents(50, seed=1)
+    X = fitted.vectorizer.transform(new_documents)
+    W = fitted.nmf_model.transform(X)
+    fitted.partial_fit_nmf(new_documents, originals=new_documents)
+    np.testing.assert_allclose(fitted.wtx, wtx + X.T.dot(W).T)
+    np.testing.assert_allclose(fitted.wtw, wtw + W.T @ W)
+    assert fitted.documents_seen == 200
+    assert fitted.topic_doc_counts.sum() <= 200
+    assert all(len(representatives) <= 3 for representatives in fitted.representatives)
+
+
+def test_partial_fit_converges_near_a_full_refit(fitted):
+    old_documents = make_documents(150, seed=0)
+    new_documents = make_documents(150, seed=1)
+    for start in range(0, len(new_documents), 50):
+        fitted.partial_fit_nmf(new_documents[start:start + 50], n_iter=50)
+
+    refit = TopicModelingPipeline(n_topics=3)
+    refit.fit_nmf(old_documents + new_documents)
+    all_documents = old_documents + new_documents
+    incremental_error = reconstruction_error(fitted, all_documents)
+    assert incremental_error <= reconstruction_error(refit, all_documents) * 1.05
+    # Every incrementally updated topic points the same way as one topic of the full refit.
+    terms = list(refit.vectorizer.get_feature_names_out())
+    refit_components = refit.nmf_model.components_[:, [terms.index(t) for t in fitted.vectorizer.get_feature_names_out()]]
+    similarity = normalize(fitted.nmf_model.components_) @ normalize(refit_components).T
+    assert sorted(similarity.argmax(axis=1)) == [0, 1, 2]
+    assert similarity.max(axis=1).min() > 0.99
+
+
+def test_fit_nmf_resets_the_running_statistics(fitted):
+    fitted.partial_fit_nmf(make_documents(50, seed=1))
+    documents = make_documents(80, seed=2)
+    fitted.fit_nmf(documents)
+    X = fitted.vectorizer.transform(documents)
+    W = fitted.nmf_model.transform(X)
+    assert fitted.documents_seen == 80
+    assert fitted.topic_doc_counts.sum() <= 80
+    assert fitted.representatives == [[], [], []]
+    np.testing.assert_allclose(fitted.wtw, W.T @ W, rtol=1e-3)
+    np.testing.assert_allclose(fitted.wtx, X.T.dot(W).T, rtol=1e-3, atol=1e-8)
+
+
+def test_partial_fit_requires_a_fitted_model():
+    with pytest.raises(ValueError, match='fit_nmf'):
+        TopicModelingPipeline(n_topics=3).partial_fit_nmf(make_documents(5))
@@ -0,0 +1,130 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import copy_chat_messages
+from logger import logging
+
+ChatRow = Tuple[str, str, str, str]
+
+
+class ChatMessageWriter:
+    """
+    Write-behind buffer for customer_chat rows.
+
+    Rows are collected in memory and written with one COPY when max_batch rows are waiting
+    or every flush_interval seconds, whichever comes first. Pending rows are drained on
+    shutdown. In synchronous mode add() only returns once the rows are committed.
+    """
+
+    def __init__(self, max_batch: int = 200, flush_interval: float = 1.0,
+                 max_buffer: int = 10000, synchronous: bool = False):
+        """
+        Initialize the writer.
+
+        Args:
+            max_batch (int): Buffered rows that trigger an immediate flush.
+            flush_interval (float): Maximum seconds a row waits before being flushed.
+            max_buffer (int): Rows kept while the database is unreachable; the oldest are dropped beyond this.
+            synchronous (bool): Flush before add() returns, trading latency for durability.
+        """
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.synchronous = synchronous
+        self._buffer: List[ChatRow] = []
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls) -> "ChatMessageWriter":
+        """Build a writer configured through CHAT_WRITE_* environment variables."""
+        return cls(
+            max_batch=int(os.getenv("CHAT_WRITE_BATCH_SIZE", "200")),
+            flush_interval=float(os.getenv("CHAT_WRITE_FLUSH_SECONDS", "1.0")),
+            max_buffer=int(os.getenv("CHAT_WRITE_MAX_BUFFER", "10000")),
+            synchronous=os.getenv("CHAT_WRITE_SYNC", "false").lower() in ("1", "true", "yes"),
+        )
+
+    async def start(self):
+        """Start the periodic flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logging.info("Chat message writer started")
+
+    async def stop(self):
+        """Stop the flush loop and drain every pending row."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._buffer:
+            logging.error(f"Chat message writer stopped with {len(self._buffer)} unwritten rows")
+        logging.info("Chat message writer stopped")
+
+    async def add(self, rows: List[ChatRow]):
+        """
+        Queue chat rows for writing.
+
+        Args:
+            rows (List[ChatRow]): (chat_id, customer_id, sender, message_content) tuples.
+        """
+        self._buffer.extend(rows)
+        self._trim()
+        if self.synchronous:
+            await self.flush()
+        elif len(self._buffer) >= self.max_batch:
+            self._wake.set()
+
+    async def flush(self):
+        """Write everything buffered so far in one COPY, keeping the rows for a retry on failure."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            try:
+                self.rows_written += await copy_chat_messages(rows)
+                self.flushes += 1
+            except Exception as e:
+                self.failures += 1
+                logging.error(f"Failed to flush {len(rows)} chat messages, will retry: {e}")
+                self._buffer = rows + self._buffer
+                self._trim()
+                if self.synchronous:
+                    raise
+
+    def _trim(self):
+        """Drop the oldest rows beyond max_buffer."""
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+            logging.error(f"Chat message buffer full, dropped {overflow} oldest rows")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "synchronous": self.synchronous,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,64 @@
+import time
+from typing import Any, Dict
+
+from logger import logging
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing downstream service for a while instead of waiting on every request.
+
+    After failure_threshold consecutive failures the breaker opens and rejects calls for
+    reset_timeout seconds; the next call after that is let through as a trial and closes the
+    breaker again on success.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            name (str): Name of the protected service, used in logs.
+            failure_threshold (int): Consecutive failures that open the breaker.
+            reset_timeout (float): Seconds to stay open before allowing a trial call.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        """Return False while the breaker is open."""
+        if self.state == "open":
+            self.rejected += 1
+            return False
+        return True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logging.info(f"Circuit for {self.name} closed")
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            logging.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} failures")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,92 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+from logger import logging
+
+
+class ConversationStore:
+    """
+    Bounded in-memory chat history keyed by chat session.
+
+    Each session keeps at most max_messages messages in a ring buffer, and at most
+    max_sessions sessions are kept; the least recently used session is evicted first.
+    Memory therefore stays bounded however long the server runs. Full history is still
+    persisted to customer_chat by the chat writer.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_messages: int = 200):
+        """
+        Initialize the store.
+
+        Args:
+            max_sessions (int): Sessions kept before the least recently used one is evicted.
+            max_messages (int): Messages kept per session; older ones fall off the ring buffer.
+        """
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._next_seq: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ConversationStore":
+        """Build a store configured through CHAT_HISTORY_* environment variables."""
+        return cls(
+            max_sessions=int(os.getenv("CHAT_HISTORY_MAX_SESSIONS", "1000")),
+            max_messages=int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "200")),
+        )
+
+    def append(self, session_id: str, sender: str, text: str, topic: Optional[str] = None):
+        """Add a message, optionally tagged with its topic, to the end of a session's history."""
+        with self._lock:
+            messages = self._sessions.get(session_id)
+            if messages is None:
+                messages = deque(maxlen=self.max_messages)
+                self._sessions[session_id] = messages
+                self._next_seq[session_id] = 0
+                if len(self._sessions) > self.max_sessions:
+                    evicted, _ = self._sessions.popitem(last=False)
+                    self._next_seq.pop(evicted, None)
+                    self.evictions += 1
+                    logging.info(f"Evicted chat history of session {evicted}")
+            else:
+                self._sessions.move_to_end(session_id)
+            seq = self._next_seq[session_id]
+            self._next_seq[session_id] = seq + 1
+            messages.append({"seq": seq, "sender": sender, "text": text, "topic": topic})
+
+    def page(self, session_id: str, limit: int = 50, before: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Return a page of a session's history, oldest message first.
+
+        Args:
+            session_id (str): Chat session to read.
+            limit (int): Maximum number of messages to return.
+            before (Optional[int]): Only return messages with a sequence number below this; None for the latest page.
+
+        Returns:
+            Dict[str, Any]: The messages and the 'before' cursor for the previous page (None when there is none).
+        """
+        limit = max(1, limit)
+        with self._lock:
+            messages = self._sessions.get(session_id)
+            if messages is None:
+                return {"messages": [], "before": None}
+            self._sessions.move_to_end(session_id)
+            candidates = [m for m in messages if before is None or m["seq"] < before]
+        selected = candidates[-limit:]
+        has_more = len(candidates) > len(selected)
+        return {"messages": selected, "before": selected[0]["seq"] if has_more else None}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "messages": sum(len(messages) for messages in self._sessions.values()),
+                "max_sessions": self.max_sessions,
+                "max_messages": self.max_messages,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,244 @@
+import asyncio
+import base64
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import get_service_url
+from database import get_db_connection
+from http_client import get_http_client
+from logger import logging
+from prediction import build_features, predict_batch
+from psycopg2.extras import execute_values
+
+CUSTOMER_COLUMNS = {
+    "customerid", "count", "country", "state", "city", "zip_code", "lat_long", "latitude",
+    "longitude", "gender", "senior_citizen", "partner", "dependents", "tenure_months",
+    "phone_service", "multiple_lines", "internet_service", "online_security", "online_backup",
+    "device_protection", "tech_support", "streaming_tv", "streaming_movies", "contract",
+    "paperless_billing", "payment_method", "monthly_charges", "total_charges", "churn_label",
+    "churn_value", "churn_score", "cltv", "churn_reason"
+}
+FEATURE_COLUMNS = [
+    "customerid", "gender", "senior_citizen", "partner", "tenure_months", "phone_service",
+    "internet_service", "online_security", "online_backup", "device_protection", "tech_support",
+    "streaming_tv", "streaming_movies", "contract", "paperless_billing", "payment_method",
+    "monthly_charges", "total_charges", "cltv"
+]
+LOYALTY_CONTRACTS = {"Low": "%month%", "Medium": "%one year%", "High": "%two year%"}
+SORT_ORDERS = {
+    "customer_id": ("c.customerid", "ASC"),
+    "churn_desc": ("s.churn_probability", "DESC"),
+    "churn_asc": ("s.churn_probability", "ASC"),
+}
+MAX_PAGE_SIZE = 500
+
+CHURN_SCORE_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS customer_churn_score (
+        customerid text PRIMARY KEY,
+        churn_probability double precision NOT NULL,
+        scored_at timestamp with time zone DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS idx_customer_churn_score_rank
+        ON customer_churn_score (churn_probability, customerid);
+"""
+
+
+def get_loyalty(user):
+    contract = (user.get("contract") or "").lower()
+    if "month" in contract:
+        return "Low"
+    elif "one year" in contract:
+        return "Medium"
+    elif "two year" in contract:
+        return "High"
+    else:
+        return "Unknown"
+
+
+def encode_cursor(sort_value: Any, customer_id: str) -> str:
+    """Encode the last row's sort key as an opaque keyset cursor."""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, customer_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a keyset cursor produced by encode_cursor."""
+    try:
+        sort_value, customer_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [sort_value, customer_id]
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def ensure_churn_score_table():
+    """Create the persisted churn score table if it does not exist yet."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(CHURN_SCORE_TABLE_DDL)
+        conn.commit()
+
+
+def fetch_customer_page(limit: int = 50, cursor: Optional[str] = None, sort: str = "customer_id",
+                        loyalty: Optional[str] = None, contract: Optional[str] = None,
+                        min_churn: Optional[float] = None, fields: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Fetch one page of customers with their persisted churn score using keyset pagination.
+
+    Sorting by churn only returns customers that the scoring job has already scored.
+
+    Args:
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+        cursor (Optional[str]): Cursor returned with the previous page.
+        sort (str): One of 'customer_id', 'churn_desc' or 'churn_asc'.
+        loyalty (Optional[str]): 'Low', 'Medium' or 'High', derived from the contract type.
+        contract (Optional[str]): Exact contract value to filter on.
+        min_churn (Optional[float]): Minimum churn probability in percent.
+        fields (Iterable[str]): Extra customer_data columns to include.
+
+    Returns:
+        Dict[str, Any]: The page of customers and the cursor for the next page (None on the last page).
+
+    Raises:
+        ValueError: If a sort order, loyalty level, field or cursor is invalid.
+    """
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort order: {sort}")
+    if loyalty is not None and loyalty not in LOYALTY_CONTRACTS:
+        raise ValueError(f"Unknown loyalty level: {loyalty}")
+    unknown_fields = [field for field in fields if field not in CUSTOMER_COLUMNS]
+    if unknown_fields:
+        raise ValueError(f"Unknown fields: {unknown_fields}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    sort_column, direction = SORT_ORDERS[sort]
+    by_churn = sort != "customer_id"
+    columns = ["c.customerid", "c.contract"] + [f"c.{field}" for field in dict.fromkeys(fields)
+                                               if field not in ("customerid", "contract")]
+    join = "JOIN" if by_churn or min_churn is not None else "LEFT JOIN"
+    conditions, params = [], []
+    if loyalty is not None:
+        conditions.append("c.contract ILIKE %s")
+        params.append(LOYALTY_CONTRACTS[loyalty])
+    if contract is not None:
+        conditions.append("c.contract = %s")
+        params.append(contract)
+    if min_churn is not None:
+        conditions.append("s.churn_probability >= %s")
+        params.append(min_churn)
+    if cursor is not None:
+        sort_value, last_id = decode_cursor(cursor)
+        comparison = "<" if direction == "DESC" else ">"
+        if by_churn:
+            conditions.append(f"(s.churn_probability, s.customerid) {comparison} (%s, %s)")
+            params.extend([sort_value, last_id])
+        else:
+            conditions.append("c.customerid > %s")
+            params.append(last_id)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = f"{sort_column} {direction}, c.customerid {direction}" if by_churn else "c.customerid ASC"
+    query = f"""
+        SELECT {', '.join(columns)}, s.churn_probability, s.scored_at
+        FROM customer_data c
+        {join} customer_churn_score s ON s.customerid = c.customerid
+        {where}
+        ORDER BY {order}
+        LIMIT %s
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, (*params, limit + 1))
+            rows = cur.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    customers = []
+    for row in rows:
+        customer = {
+            "customer_id":       row["customerid"],
+            "loyalty":           get_loyalty(row),
+            "churn_probability": row["churn_probability"],
+            "scored_at":         row["scored_at"].isoformat() if row["scored_at"] else None,
+        }
+        customer.update({field: row[field] for field in fields if field != "customerid"})
+        customers.append(customer)
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last["churn_probability"] if by_churn else None, last["customerid"])
+    return {"customers": customers, "next_cursor": next_cursor}
+
+
+def fetch_feature_batch(after: str, limit: int) -> List[Dict[str, Any]]:
+    """Fetch the model input columns for the next batch of customers ordered by id."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {', '.join(FEATURE_COLUMNS)} FROM customer_data "
+                "WHERE customerid > %s ORDER BY customerid LIMIT %s",
+                (after, limit)
+            )
+            return cur.fetchall()
+
+
+def upsert_churn_scores(scores: Dict[str, Optional[float]]) -> int:
+    """Insert or update persisted churn scores, skipping customers that failed to score."""
+    rows = [(customer_id, score) for customer_id, score in scores.items() if score is not None]
+    if not rows:
+        return 0
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO customer_churn_score (customerid, churn_probability)
+                VALUES %s
+                ON CONFLICT (customerid) DO UPDATE
+                SET churn_probability = EXCLUDED.churn_probability, scored_at = now()
+            """, rows)
+        conn.commit()
+    return len(rows)
+
+
+async def refresh_churn_scores(batch_size: int = 1000) -> int:
+    """
+    Re-score every customer through the batch churn API and persist the results.
+
+    Args:
+        batch_size (int): Customers read from the database per round.
+
+    Returns:
+        int: Number of scores written.
+    """
+    prediction_url = get_service_url('ml_service_batch')
+    after, written = "", 0
+    while True:
+        rows = await asyncio.to_thread(fetch_feature_batch, after, batch_size)
+        if not rows:
+            break
+        features = {}
+        for row in rows:
+            try:
+                features[row["customerid"]] = build_features(row)
+            except (TypeError, ValueError) as e:
+                logging.warning(f"Skipping customer {row['customerid']} with invalid features: {e}")
+        scores = await predict_batch(get_http_client(), features, churn_api_url=prediction_url)
+        written += await asyncio.to_thread(upsert_churn_scores, scores)
+        after = rows[-1]["customerid"]
+    logging.info(f"Churn score refresh wrote {written} scores")
+    return written
+
+
+async def run_churn_scoring_job(interval_seconds: Optional[float] = None):
+    """Refresh persisted churn scores forever, sleeping interval_seconds between runs."""
+    if interval_seconds is None:
+        interval_seconds = float(os.getenv("CHURN_SCORING_INTERVAL_SECONDS", "900"))
+    try:
+        await asyncio.to_thread(ensure_churn_score_table)
+    except Exception as e:
+        logging.error(f"Could not create customer_churn_score table: {e}")
+    while True:
+        try:
+            await refresh_churn_scores()
+        except Exception:
+            logging.exception("Churn score refresh failed")
+        await asyncio.sleep(interval_seconds)
@@ -1,6 +1,6 @@
-import psycopg2
 from psycopg2 import OperationalError, DatabaseError
 from typing import List, Tuple
+from database import get_db_connection
 from logger import logging
 
 
@@ -17,15 +17,7 @@ def get_admin() -> List[Tuple[str]]:
         Exception: For any other unexpected errors.
     """
     try:
-        with psycopg2.connect(
-            database="telcom",
-            user="postgres",
-            password="postgres",
-            host="postgres",
-            port="5432"
-        ) as conn:
-            logging.info("Connected to PostgreSQL successfully.")
-
+        with get_db_connection(dict_rows=False) as conn:
             with conn.cursor() as cursor:
                 query: str = "SELECT username,password FROM admin"
                 cursor.execute(query)
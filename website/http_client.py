@@ -0,0 +1,40 @@
+from typing import Optional
+
+import httpx
+from logger import logging
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def start_http_client(max_connections: int = 20, timeout: float = 15.0):
+    """
+    Create the application-wide keep-alive HTTP client.
+
+    Args:
+        max_connections (int): Upper bound on pooled connections across all hosts.
+        timeout (float): Default request timeout in seconds.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections)
+        )
+        logging.info("Shared HTTP client started")
+
+
+async def close_http_client():
+    """Close the shared HTTP client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logging.info("Shared HTTP client closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, failing loudly if the app has not started it."""
+    if _client is None:
+        raise RuntimeError("HTTP client not started")
+    return _client
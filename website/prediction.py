@@ -1,5 +1,43 @@
+import asyncio
 import requests
 import json
+from typing import Dict, Optional
+
+import httpx
+from logger import logging
+
+
+def build_features(user):
+    """Map a customer_data row onto the churn API payload."""
+    return {
+        "Gender":             user["gender"],
+        "Senior_Citizen":     user["senior_citizen"],
+        "Partner":            user["partner"],
+        "Tenure_Months":      user["tenure_months"],
+        "Phone_Service":      user["phone_service"],
+        "Internet_Service":   user["internet_service"],
+        "Online_Security":    user["online_security"],
+        "Online_Backup":      user["online_backup"],
+        "Device_Protection":  user["device_protection"],
+        "Tech_Support":       user["tech_support"],
+        "Streaming_TV":       user["streaming_tv"],
+        "Streaming_Movies":   user["streaming_movies"],
+        "Contract":           user["contract"],
+        "Paperless_Billing":  user["paperless_billing"],
+        "Payment_Method":     user["payment_method"],
+        "Monthly_Charges":    float(user["monthly_charges"]),
+        "Total_Charges":      float(user["total_charges"]) if str(user["total_charges"] or "").strip() else 0.0,
+        "CLTV":               float(user["cltv"]),
+    }
+
+
+def to_percentage(churn_score) -> Optional[float]:
+    """Convert a churn API score ([p_stay, p_churn] or a scalar) to a rounded percentage."""
+    if isinstance(churn_score, list) and len(churn_score) > 1:
+        return round(churn_score[1] * 100, 2)
+    if isinstance(churn_score, (int, float)):
+        return round(churn_score * 100, 2)
+    return None
 
 
 def predict(customer_data, churn_api_url="http://ml_service/predict_churn"):
@@ -13,14 +51,10 @@ def predict(customer_data, churn_api_url="http://ml_service/predict_churn"):
         response.raise_for_status()
         prediction_result = response.json()
         if "churn_score" in prediction_result:
-            churn_score = prediction_result["churn_score"]
-            if isinstance(churn_score, list) and len(churn_score) > 1:
-                churn_score = churn_score[1] * 100
-            elif isinstance(churn_score, (int, float)):
-                churn_score = churn_score * 100
-            else:
-                return json.dumps({"error": "Invalid churn_score format", "details": churn_score})
-            return json.dumps({"churn_score": round(churn_score, 2)})
+            churn_score = to_percentage(prediction_result["churn_score"])
+            if churn_score is None:
+                return json.dumps({"error": "Invalid churn_score format", "details": prediction_result["churn_score"]})
+            return json.dumps({"churn_score": churn_score})
         else:
             return json.dumps({"error": "API response does not contain 'churn_score'", "details": prediction_result})
     except requests.exceptions.RequestException as e:
@@ -38,3 +72,48 @@ def predict(customer_data, churn_api_url="http://ml_service/predict_churn"):
             "error": "An unexpected error occurred during churn prediction",
             "details": str(e)
         })
+
+
+async def predict_batch(client: httpx.AsyncClient, customers: Dict[str, dict],
+                        churn_api_url="http://ml_service/predict_churn_batch",
+                        batch_size: int = 256, max_concurrency: int = 4) -> Dict[str, Optional[float]]:
+    """
+    Score many customers through the batch churn API over a shared keep-alive client.
+
+    Customers are split into chunks that are sent concurrently, with at most
+    max_concurrency requests in flight. The API scores each valid customer even when others in
+    the chunk are rejected; the rejected ones are logged and come back as None.
+
+    Args:
+        client (httpx.AsyncClient): Shared HTTP client.
+        customers (Dict[str, dict]): Churn API payloads keyed by customer id.
+        churn_api_url (str): URL of the /predict_churn_batch endpoint.
+        batch_size (int): Customers per request.
+        max_concurrency (int): Maximum concurrent requests.
+
+    Returns:
+        Dict[str, Optional[float]]: Churn percentage per customer id, None where scoring failed.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    items = list(customers.items())
+    chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+    async def score_chunk(chunk):
+        payload = {"customers": [{**features, "CustomerID": customer_id} for customer_id, features in chunk]}
+        async with semaphore:
+            try:
+                response = await client.post(churn_api_url, json=payload)
+                response.raise_for_status()
+                body = response.json()
+                scores = body.get("churn_scores", {})
+                for customer_id, error in body.get("errors", {}).items():
+                    logging.warning(f"Churn prediction failed for customer {customer_id}: {error}")
+            except (httpx.HTTPError, ValueError) as e:
+                logging.error(f"Batch churn prediction failed for {len(chunk)} customers: {e}")
+                scores = {}
+        return {customer_id: to_percentage(scores.get(customer_id)) for customer_id, _ in chunk}
+
+    results = {}
+    for chunk_scores in await asyncio.gather(*(score_chunk(chunk) for chunk in chunks)):
+        results.update(chunk_scores)
+    return results
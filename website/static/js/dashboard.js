@@ -43,15 +43,21 @@ document.querySelectorAll('.tab-link').forEach(tab => {
 
 // Customer Data Handling
 let customers = [];
-let originalCustomers = [];
+let nextCursor = null;
+let customerQuery = { sort: 'customer_id' };
+const CUSTOMER_PAGE_SIZE = 50;
 
-async function fetchCustomers() {
+async function fetchCustomers(reset = true) {
     try {
-        const response = await fetch('/api/customers');
+        const params = new URLSearchParams({ limit: CUSTOMER_PAGE_SIZE, ...customerQuery });
+        if (!reset && nextCursor) params.set('cursor', nextCursor);
+        const response = await fetch(`/api/customers?${params}`);
         if (!response.ok) throw new Error('Network response was not ok');
-        customers = await response.json();
-        originalCustomers = [...customers];
+        const page = await response.json();
+        customers = reset ? page.customers : customers.concat(page.customers);
+        nextCursor = page.next_cursor;
         renderCustomerTable(customers);
+        document.getElementById('load-more-customers').classList.toggle('hidden', !nextCursor);
         document.getElementById('customer-error').classList.add('hidden');
     } catch (error) {
         console.error('Error fetching customers:', error);
@@ -59,6 +65,8 @@ async function fetchCustomers() {
     }
 }
 
+document.getElementById('load-more-customers').addEventListener('click', () => fetchCustomers(false));
+
 // Render customer table
 function renderCustomerTable(data) {
     const tbody = document.getElementById('customer-table-body');
@@ -100,6 +108,12 @@ document.querySelectorAll('#customer-table th.cursor-pointer').forEach(th => {
     th.addEventListener('click', () => {
         const key = th.dataset.sort;
         const isAsc = th.classList.toggle('asc');
+        if (key === 'churn') {
+            // Churn ordering spans the whole customer base, so it is done server side
+            customerQuery.sort = isAsc ? 'churn_asc' : 'churn_desc';
+            fetchCustomers();
+            return;
+        }
         customers.sort((a, b) => {
             let valA = a[key];
             let valB = b[key];
@@ -107,7 +121,7 @@ document.querySelectorAll('#customer-table th.cursor-pointer').forEach(th => {
                 const loyaltyOrder = { Low: 1, Medium: 2, High: 3 };
                 valA = loyaltyOrder[valA];
                 valB = loyaltyOrder[valB];
-            } else if (key === 'name') {
+            } else if (key === 'customer_id') {
                 return isAsc ? valA.localeCompare(valB) : valB.localeCompare(valA);
             }
             return isAsc ? valA - valB : valB - valA;
@@ -127,12 +141,10 @@ document.getElementById('apply-filters').addEventListener('click', () => {
         return;
     }
 
-    customers = originalCustomers.filter(customer => {
-        const churnMatch = customer.churn_probability >= churnFilter;
-        const loyaltyMatch = loyaltyFilter === 'all' || customer.loyalty === loyaltyFilter;
-        return churnMatch && loyaltyMatch;
-    });
-    renderCustomerTable(customers);
+    customerQuery = { sort: customerQuery.sort };
+    if (churnFilter > 0) customerQuery.min_churn = churnFilter;
+    if (loyaltyFilter !== 'all') customerQuery.loyalty = loyaltyFilter;
+    fetchCustomers();
 });
 
 // Select All Checkbox
@@ -204,17 +216,16 @@ function renderTopics(topics) {
         return;
     }
     topics.forEach(topic => {
-        console.log(topic.frequency)
         const card = document.createElement('div');
         card.className = 'topic-card';
         card.innerHTML = `
             <h3 class="text-lg font-semibold text-gray-800">${topic.topic_name}</h3>
             <p class="text-gray-600">${topic.description}</p>
+            <p class="text-sm text-gray-500 mt-2">Frequency: ${topic.frequency}</p>
         `;
         container.appendChild(card);
     });
 }
-// <p class="text-sm text-gray-500 mt-2">Frequency: ${topic.frequency}</p>
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     initTableau();
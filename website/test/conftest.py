@@ -0,0 +1,48 @@
+import os
+import sys
+from contextlib import contextmanager
+
+WEBSITE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if WEBSITE_DIR not in sys.path:
+    sys.path.insert(0, WEBSITE_DIR)
+
+
+class FakeCursor:
+    """Cursor that records executed statements and returns canned rows."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        self.connection.executed.append((query, params))
+
+    def fetchall(self):
+        return self.connection.rows
+
+
+class FakeConnection:
+    """Stand-in for a psycopg2 connection handed out by get_db_connection."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+
+def fake_db_connection(connection):
+    """A get_db_connection replacement that always yields connection."""
+    @contextmanager
+    def get_db_connection(dict_rows=True):
+        yield connection
+    return get_db_connection
@@ -0,0 +1,138 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+import database
+from chat_writer import ChatMessageWriter
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.pool.calls += 1
+        if self.pool.calls <= self.pool.failures:
+            raise ConnectionError("connection refused")
+        self.pool.copied.extend(records)
+        return f"COPY {len(records)}"
+
+
+class FakePool:
+    """Minimal asyncpg pool whose COPY fails for the first `failures` calls."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.copied = []
+        self.calls = 0
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        yield FakeConnection(self)
+
+    def get_idle_size(self):
+        return 1
+
+    def get_size(self):
+        return 1
+
+    def get_max_size(self):
+        return 1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(database, '_async_pool', pool)
+    return pool
+
+
+def rows(start, n):
+    return [(f"chat{i}", "customer", "user", f"message {i}") for i in range(start, start + n)]
+
+
+def test_failed_flush_keeps_rows_for_the_next_one(pool):
+    pool.failures = 1
+
+    async def scenario():
+        writer = ChatMessageWriter(max_batch=100, flush_interval=60)
+        await writer.add(rows(0, 3))
+        await writer.flush()
+        assert pool.copied == [] and writer.stats()['buffered'] == 3
+        await writer.add(rows(3, 2))
+        await writer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    # The retried rows keep their order ahead of the newer ones.
+    assert pool.copied == rows(0, 5)
+    assert writer.stats() == {'buffered': 0, 'synchronous': False, 'flushes': 1, 'rows_written': 5,
+                              'failures': 1, 'dropped': 0}
+
+
+def test_buffer_is_capped_while_the_database_is_down(pool):
+    pool.failures = 3
+
+    async def scenario():
+        writer = ChatMessageWriter(max_batch=100, flush_interval=60, max_buffer=4)
+        for start in (0, 3, 6):
+            await writer.add(rows(start, 3))
+            assert writer.stats()['buffered'] <= 4
+            await writer.flush()
+            assert writer.stats()['buffered'] <= 4
+        await writer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    # The oldest rows are dropped first.
+    assert pool.copied == rows(5, 4)
+    assert writer.dropped == 5
+
+
+def test_max_buffer_is_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv('CHAT_WRITE_MAX_BUFFER', '7')
+    assert ChatMessageWriter.from_env().max_buffer == 7
+
+
+def test_stop_drains_the_buffer(pool):
+    async def scenario():
+        writer = ChatMessageWriter(max_batch=100, flush_interval=60)
+        await writer.start()
+        await writer.add(rows(0, 5))
+        assert pool.copied == []
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert pool.copied == rows(0, 5)
+    assert writer.stats()['buffered'] == 0
+
+
+def test_full_batch_wakes_the_flush_loop(pool):
+    async def scenario():
+        writer = ChatMessageWriter(max_batch=3, flush_interval=60)
+        await writer.start()
+        await writer.add(rows(0, 3))
+        for _ in range(100):
+            if pool.copied:
+                break
+            await asyncio.sleep(0.01)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert pool.copied == rows(0, 3)
+
+
+def test_synchronous_writer_raises_and_keeps_rows(pool):
+    pool.failures = 1
+
+    async def scenario():
+        writer = ChatMessageWriter(synchronous=True)
+        with pytest.raises(ConnectionError):
+            await writer.add(rows(0, 2))
+        assert writer.stats()['buffered'] == 2
+        await writer.add(rows(2, 1))
+
+    asyncio.run(scenario())
+    assert pool.copied == rows(0, 3)
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import customers
+from conftest import FakeConnection, fake_db_connection
+from customers import decode_cursor, encode_cursor, fetch_customer_page
+
+
+def customer_rows(n, start=0):
+    return [{'customerid': f"{i:04d}-ABCDE", 'contract': 'Month-to-month', 'churn_probability': 90.0 - i,
+             'scored_at': datetime(2026, 1, 1, tzinfo=timezone.utc)} for i in range(start, start + n)]
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(customers, 'get_db_connection', fake_db_connection(connection))
+    return connection
+
+
+@pytest.mark.parametrize('sort_value', [None, 42.5, 0])
+def test_cursor_round_trip(sort_value):
+    assert decode_cursor(encode_cursor(sort_value, '7590-VHVEG')) == [sort_value, '7590-VHVEG']
+
+
+@pytest.mark.parametrize('cursor', ['not a cursor', encode_cursor(1, 'a')[:-4], 'WzEsMiwzXQ==', 'NDI='])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'sort': 'churn; DROP TABLE customer_data'}, 'Unknown sort order'),
+    ({'loyalty': 'Platinum'}, 'Unknown loyalty level'),
+    ({'fields': ['gender', 'password']}, 'Unknown fields'),
+    ({'cursor': 'not a cursor'}, 'Invalid cursor'),
+])
+def test_invalid_arguments_raise_before_querying(connection, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        fetch_customer_page(**kwargs)
+    assert connection.executed == []
+
+
+def test_next_cursor_is_none_on_the_last_page(connection):
+    connection.rows = customer_rows(3)
+    page = fetch_customer_page(limit=3)
+    assert [customer['customer_id'] for customer in page['customers']] == ['0000-ABCDE', '0001-ABCDE', '0002-ABCDE']
+    assert page['next_cursor'] is None
+    # One row beyond the limit is requested to detect a following page.
+    assert connection.executed[0][1][-1] == 4
+
+
+def test_next_cursor_continues_after_the_last_row(connection):
+    connection.rows = customer_rows(3)
+    page = fetch_customer_page(limit=2, sort='churn_desc')
+    assert len(page['customers']) == 2
+    assert decode_cursor(page['next_cursor']) == [89.0, '0001-ABCDE']
+
+    connection.rows = customer_rows(1, start=2)
+    fetch_customer_page(limit=2, sort='churn_desc', cursor=page['next_cursor'])
+    query, params = connection.executed[-1]
+    assert '(s.churn_probability, s.customerid) < (%s, %s)' in query
+    assert list(params) == [89.0, '0001-ABCDE', 3]
+
+
+def test_customer_id_cursor_uses_the_id_only(connection):
+    connection.rows = customer_rows(1)
+    fetch_customer_page(limit=5, cursor=encode_cursor(None, '0003-ABCDE'), loyalty='Low')
+    query, params = connection.executed[0]
+    assert 'c.customerid > %s' in query and 'LEFT JOIN' in query
+    assert list(params) == ['%month%', '0003-ABCDE', 6]
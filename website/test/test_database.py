@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+import psycopg2
+import pytest
+
+import database
+
+
+def postgres_available():
+    try:
+        psycopg2.connect(**database.get_db_params(), connect_timeout=2).close()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not os.getenv('DATABASE_URL') or not postgres_available(),
+                                reason='needs a reachable Postgres at DATABASE_URL')
+
+
+@pytest.fixture
+def pools():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(database.init_pools(min_size=1, max_size=3))
+    yield
+    loop.run_until_complete(database.close_pools())
+    loop.close()
+
+
+def test_sync_pool_counts_connections_at_get_and_put(pools):
+    stats = database.pool_stats()['psycopg2']
+    assert (stats['max_size'], stats['in_use'], stats['idle']) == (3, 0, 3)
+
+    with database.get_db_connection() as first, database.get_db_connection() as second:
+        assert first is not second
+        stats = database.pool_stats()['psycopg2']
+        assert (stats['in_use'], stats['idle']) == (2, 1)
+
+    stats = database.pool_stats()['psycopg2']
+    assert (stats['in_use'], stats['idle']) == (0, 3)
+
+
+def test_returned_connections_stay_open_for_reuse(pools):
+    with database.get_db_connection() as conn:
+        backends = {conn.get_backend_pid()}
+    for _ in range(5):
+        with database.get_db_connection() as conn:
+            assert not conn.closed
+            backends.add(conn.get_backend_pid())
+    # Connections are handed out round robin from a pool that never closes them on return.
+    assert len(backends) <= 3
+
+
+def test_broken_connection_is_not_counted_as_idle(pools):
+    with database.get_db_connection() as conn:
+        conn.close()
+    stats = database.pool_stats()['psycopg2']
+    assert (stats['in_use'], stats['idle']) == (0, 2)
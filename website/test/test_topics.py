@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+import topics
+
+
+class FakeTopicService:
+    """Records the jobs refresh_topics sends; jobs listed in failing_jobs fail."""
+
+    def __init__(self, state, rows, failing_jobs=()):
+        self.state = state
+        self.rows = rows
+        self.failing_jobs = set(failing_jobs)
+        self.fetched_after = []
+        self.sent = []
+
+    def fetch_data(self, after_id):
+        self.fetched_after.append(after_id)
+        return [row for row in self.rows if row[0] > after_id]
+
+    def send_documents(self, documents, last_message_id, full_refit):
+        self.sent.append((documents, last_message_id, full_refit))
+        return {"job_id": f"job{len(self.sent)}"}
+
+    def get_topic_job(self, job_id):
+        return {"status": "failed" if job_id in self.failing_jobs else "succeeded", "error": "boom"}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    def install(state, rows, failing_jobs=()):
+        fake = FakeTopicService(state, rows, failing_jobs)
+        monkeypatch.setattr(topics, 'get_topic_state', lambda: fake.state)
+        monkeypatch.setattr(topics, 'fetch_data', fake.fetch_data)
+        monkeypatch.setattr(topics, 'send_documents', fake.send_documents)
+        monkeypatch.setattr(topics, 'get_topic_job', fake.get_topic_job)
+        monkeypatch.setattr(topics, 'receive_topics', lambda: [{"topic_name": "Billing"}])
+        monkeypatch.setattr(topics, 'JOB_POLL_SECONDS', 0)
+        monkeypatch.setattr(topics, '_cached_topics', [])
+        return fake
+    return install
+
+
+def messages(first_id, n):
+    return [(message_id, f"message {message_id}") for message_id in range(first_id, first_id + n)]
+
+
+def test_unfitted_model_gets_the_whole_history_in_one_full_refit(service):
+    fake = service({"fitted": False, "high_water_mark": 0, "pending_jobs": 0}, messages(1, 12))
+    assert asyncio.run(topics.refresh_topics(batch_size=5)) == 12
+    assert fake.fetched_after == [0]
+    assert [(len(documents), last_id, full) for documents, last_id, full in fake.sent] == [(12, 12, True)]
+    assert topics.get_cached_topics() == [{"topic_name": "Billing"}]
+
+
+def test_fitted_model_only_gets_messages_after_the_high_water_mark(service):
+    fake = service({"fitted": True, "high_water_mark": 10, "pending_jobs": 0}, messages(1, 22))
+    assert asyncio.run(topics.refresh_topics(batch_size=5)) == 12
+    assert fake.fetched_after == [10]
+    # Each incremental job carries the id of its last message, which becomes the next high-water mark.
+    assert [(documents[0], last_id, full) for documents, last_id, full in fake.sent] == [
+        ("message 11", 15, False), ("message 16", 20, False), ("message 21", 22, False)]
+
+
+def test_failed_job_stops_the_refresh(service):
+    fake = service({"fitted": True, "high_water_mark": 0, "pending_jobs": 0}, messages(1, 15),
+                   failing_jobs={"job2"})
+    assert asyncio.run(topics.refresh_topics(batch_size=5)) == 5
+    assert [last_id for _, last_id, _ in fake.sent] == [5, 10]
+
+
+def test_blank_messages_are_skipped(service):
+    rows = [(1, "hello"), (2, "   "), (3, None), (4, "bill")]
+    fake = service({"fitted": True, "high_water_mark": 0, "pending_jobs": 0}, rows)
+    assert asyncio.run(topics.refresh_topics(batch_size=10)) == 2
+    assert fake.sent == [(["hello", "bill"], 4, False)]
+
+
+@pytest.mark.parametrize('state', [None, {"fitted": True, "high_water_mark": 0, "pending_jobs": 1}])
+def test_refresh_is_skipped_when_the_service_is_down_or_busy(service, state):
+    fake = service(state, messages(1, 3))
+    assert asyncio.run(topics.refresh_topics()) == 0
+    assert fake.fetched_after == [] and fake.sent == []
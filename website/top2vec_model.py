@@ -1,20 +1,40 @@
 import requests
-import json
-from data import fetch_data
 from logger import logging
 from config import get_service_url
-def send_documents(documents):
-    """Send documents to the API for topic modeling."""
+def send_documents(documents, last_message_id=None, full_refit=False):
+    """Queue documents for topic modeling, returning the job the API created or None on failure."""
     url = get_service_url('topic_modeling_process')
-    payload = {"documents": documents}
+    payload = {"documents": documents, "last_message_id": last_message_id, "full_refit": full_refit}
     try:
         response = requests.post(url, json=payload)
         response.raise_for_status()
-        logging.info(f"Send documnet {payload}")
-        print("Process Response:", response.json())
+        logging.info(f"Sent {len(documents)} documents up to message {last_message_id}")
+        return response.json()
     except requests.RequestException as e:
-        logging.info(f"Error in sending documents: {str(e)}")
-        print(f"Error sending documents: {str(e)}")
+        logging.error(f"Error in sending documents: {str(e)}")
+        return None
+
+def get_topic_state():
+    """Retrieve the topic model's high-water mark, or None if the service is unreachable."""
+    url = get_service_url('topic_modeling_state')
+    try:
+        response = requests.get(url)
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException as e:
+        logging.error(f"Error retrieving topic model state: {str(e)}")
+        return None
+
+def get_topic_job(job_id):
+    """Retrieve the status of a topic modelling job, or None if the service is unreachable."""
+    url = f"{get_service_url('topic_modeling_jobs')}/{job_id}"
+    try:
+        response = requests.get(url)
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException as e:
+        logging.error(f"Error retrieving topic job {job_id}: {str(e)}")
+        return None
 
 def receive_topics():
     """Retrieve topics from the API."""
@@ -23,32 +43,12 @@ def receive_topics():
         response = requests.get(url)
         response.raise_for_status()
         topics = response.json()
-        print("Process Response:", response.json())
-        print("Topics:")
         logging.info("Topics: ")
 
         for topic in topics:
-            print(f"- {topic['topic_name']}: {topic['description']}")
-            logging.info(f"- {topic['topic_name']}: {topic['description']} (Frequency: {topic['top_words']})")
+            logging.info(f"- {topic['topic_name']}: {topic['description']} (Frequency: {topic.get('frequency')})")
         return topics[:10]
     except requests.RequestException as e:
-        logging.info(f"Error retrieving topics: {str(e)}")
-        print(f"Error retrieving topics: {str(e)}")
+        logging.error(f"Error retrieving topics: {str(e)}")
         return []
 
-
-# if __name__ == "__main__":
-#     # Sample documents (replace with your data)
-
-#     documents = fetch_data()
-#     # Send documents for processing
-#     send_documents(documents)
-
-#     # Retrieve and print topics
-#     topics = get_topics()
-#     print(topics)
-
-#     # Retrieve documents for the first topic (if available)
-#     if topics:
-#         first_topic_id = topics[0]["topic_id"]
-#         print(get_documents_by_topic(first_topic_id))
\ No newline at end of file
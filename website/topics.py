@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from config import get_service_url
+from data import fetch_data
+from http_client import get_http_client
+from logger import logging
+from top2vec_model import get_topic_job, get_topic_state, receive_topics, send_documents
+
+_cached_topics: List[Dict[str, Any]] = []
+JOB_POLL_SECONDS = 1.0
+JOB_TIMEOUT_SECONDS = 600.0
+ASSIGN_TIMEOUT_SECONDS = float(os.getenv("TOPIC_ASSIGN_TIMEOUT_SECONDS", "1.0"))
+
+
+def get_cached_topics() -> List[Dict[str, Any]]:
+    """Return the topics fetched by the last refresh."""
+    return _cached_topics
+
+
+async def wait_for_job(job_id: str) -> bool:
+    """Poll a topic modelling job until it finishes, returning True if it succeeded."""
+    deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = await asyncio.to_thread(get_topic_job, job_id)
+        if job is not None and job["status"] in ("succeeded", "failed", "cancelled"):
+            if job["status"] != "succeeded":
+                logging.error(f"Topic job {job_id} {job['status']}: {job.get('error')}")
+            return job["status"] == "succeeded"
+        await asyncio.sleep(JOB_POLL_SECONDS)
+    logging.error(f"Timed out waiting for topic job {job_id}")
+    return False
+
+
+async def refresh_topics(batch_size: int = 5000) -> int:
+    """
+    Send user messages newer than the topic model's high-water mark and refresh the cached topics.
+
+    When the topic service has no fitted model yet the whole history is sent at once for a full
+    fit; afterwards only new messages are sent, in batches, for incremental updates.
+
+    Args:
+        batch_size (int): Messages sent per incremental update.
+
+    Returns:
+        int: Number of messages sent to the topic service.
+    """
+    global _cached_topics
+    state = await asyncio.to_thread(get_topic_state)
+    if state is None:
+        return 0
+    if state["pending_jobs"]:
+        logging.info("Topic jobs still running, skipping this refresh")
+        return 0
+    full_refit = not state["fitted"]
+    after_id = 0 if full_refit else state["high_water_mark"]
+    rows = await asyncio.to_thread(fetch_data, after_id)
+
+    sent = 0
+    step = len(rows) if full_refit else batch_size
+    for start in range(0, len(rows), max(step, 1)):
+        chunk = rows[start:start + step]
+        documents = [content for _, content in chunk if content and content.strip()]
+        if not documents:
+            continue
+        job = await asyncio.to_thread(send_documents, documents, chunk[-1][0], full_refit)
+        # Wait for each job so the service's high-water mark has advanced before the next round.
+        if job is None or not await wait_for_job(job["job_id"]):
+            break
+        sent += len(documents)
+        full_refit = False
+
+    if sent or not _cached_topics:
+        topics = await asyncio.to_thread(receive_topics)
+        if topics:
+            _cached_topics = topics
+    logging.info(f"Topic refresh sent {sent} new messages after message {after_id}")
+    return sent
+
+
+async def assign_topic(message: str) -> Optional[str]:
+    """
+    Tag a live chat message with its dominant topic using the already fitted topic model.
+
+    Returns None when the message matches no topic or the topic service is slow or unavailable,
+    so tagging never holds up the chat.
+    """
+    if not message.strip():
+        return None
+    try:
+        response = await get_http_client().post(get_service_url('topic_modeling_assign'),
+                                                json={"documents": [message]},
+                                                timeout=ASSIGN_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return response.json()["assignments"][0]["topic_name"]
+    except (httpx.HTTPError, ValueError, KeyError, IndexError) as e:
+        logging.info(f"Could not assign a topic to the message: {e}")
+        return None
+
+
+async def run_topic_refresh_job(interval_seconds: Optional[float] = None):
+    """Refresh topics forever, sleeping interval_seconds between runs."""
+    if interval_seconds is None:
+        interval_seconds = float(os.getenv("TOPIC_REFRESH_INTERVAL_SECONDS", "300"))
+    while True:
+        try:
+            await refresh_topics()
+        except Exception:
+            logging.exception("Topic refresh failed")
+        await asyncio.sleep(interval_seconds)